@@ -5,6 +5,11 @@ Models:
 - SenseVoice ASR (model.int8.onnx ~240MB)
 - Silero VAD (~2MB)
 - CAM++ Speaker Embedding (~30MB)
+
+SenseVoice is already distributed as int8. With --quantize-speaker, an
+int8 (dynamic quantization) copy of the CAM++ model is written next to the
+fp32 file; select it with ENGINE_SPEAKER_MODEL_FILE. This requires the
+onnxruntime package, which is not a runtime dependency.
 """
 
 import argparse
@@ -70,6 +75,29 @@ def download_model(
     return Path(downloaded_path)
 
 
+def quantize_model(model_path: Path) -> Path:
+    """Write an int8 dynamically quantized copy of an ONNX model.
+
+    Args:
+        model_path: Path to the fp32 ONNX model
+
+    Returns:
+        Path to the quantized model (``<name>.int8.onnx``)
+    """
+    # Optional tooling dependency, only needed for this step
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    target_path = model_path.with_suffix(".int8.onnx")
+    if target_path.exists():
+        print(f"  [SKIP] {target_path.name} already exists")
+        return target_path
+
+    print(f"  [QUANTIZE] {model_path.name} -> {target_path.name}...")
+    quantize_dynamic(model_path, target_path, weight_type=QuantType.QInt8)
+    print(f"  [OK] {target_path.name}")
+    return target_path
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
         description="Download VoiceAuth models from Hugging Face"
@@ -85,6 +113,11 @@ def main() -> int:
         action="store_true",
         help="Force re-download even if files exist",
     )
+    parser.add_argument(
+        "--quantize-speaker",
+        action="store_true",
+        help="Also write an int8 CAM++ model (requires onnxruntime)",
+    )
     args = parser.parse_args()
 
     models_dir: Path = args.models_dir.resolve()
@@ -118,6 +151,17 @@ def main() -> int:
         print(f"Failed downloads: {', '.join(failed)}")
         return 1
 
+    if args.quantize_speaker:
+        print()
+        print("[CAM++ Speaker Embedding int8]")
+        speaker_model = MODELS[2]
+        try:
+            quantized = quantize_model(models_dir / speaker_model["files"][0])
+        except ImportError:
+            print("  [ERROR] onnxruntime is required: pip install onnxruntime")
+            return 1
+        print(f"  Set ENGINE_SPEAKER_MODEL_FILE={quantized.name} to use it")
+
     # Show summary
     print("\nModel files:")
     for f in models_dir.rglob("*.onnx"):
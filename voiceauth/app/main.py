@@ -67,13 +67,23 @@ def create_app() -> FastAPI:
 
 
 def run_server() -> None:
-    """Run the server using uvicorn."""
-    app = create_app()
+    """Run the server using uvicorn.
+
+    The app is passed as an import string so that uvicorn can start
+    multiple worker processes. Models are loaded lazily, so each worker
+    loads its own copy after the fork. Frames larger than max_audio_bytes
+    are rejected by uvicorn before they are buffered.
+    """
     uvicorn.run(
-        app,
+        "voiceauth.app.main:app",
         host=settings.host,
         port=settings.port,
         log_level=settings.log_level,
+        workers=settings.workers,
+        loop=settings.loop,
+        http=settings.http,
+        ws_per_message_deflate=settings.ws_per_message_deflate,
+        ws_max_size=settings.max_audio_bytes,
     )
 
 
@@ -18,6 +18,13 @@ class APISettings(BaseSettings):
     log_level: str = "info"
     debug: bool = False
     websocket_timeout: int = 60  # seconds
+    workers: int = 1  # uvicorn worker processes (each loads its own models)
+    loop: str = "uvloop"  # uvicorn event loop ("auto", "asyncio", "uvloop")
+    http: str = "httptools"  # uvicorn HTTP protocol ("auto", "h11", "httptools")
+    # JSON frames are tiny and audio is already-compressed WebM
+    ws_per_message_deflate: bool = False
+    # Largest accepted WebSocket frame (one WebM utterance), in bytes
+    max_audio_bytes: int = 5 * 1024 * 1024
 
 
 settings = APISettings()
@@ -1,21 +1,29 @@
 """WebSocket endpoint for speaker enrollment."""
 
 import asyncio
-import json
+import contextlib
+import threading
+from dataclasses import dataclass
 from typing import Any
 
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel, ValidationError
 from sqlmodel import Session
 
+from voiceauth.app.model_loader import get_asr, get_vad, get_voiceprint
+from voiceauth.audio import AudioConverter
 from voiceauth.database import SpeakerStore
 from voiceauth.database.session import engine
 from voiceauth.domain_service import (
+    EnrollmentProgressCache,
     EnrollmentService,
     EnrollmentSession,
     EnrollmentState,
     SpeakerAlreadyExistsError,
 )
+from voiceauth.engine.exceptions import NoSpeechDetectedError
+from voiceauth.engine.settings import settings as engine_settings
 
 from ..settings import settings
 
@@ -30,6 +38,7 @@ class StartEnrollmentMessage(BaseModel):
     type: str  # "start_enrollment"
     speaker_id: str
     speaker_name: str | None = None
+    resume_token: str | None = None
 
 
 class RegisterPINMessage(BaseModel):
@@ -39,129 +48,211 @@ class RegisterPINMessage(BaseModel):
     pin: str
 
 
-def create_error_response(code: str, message: str) -> dict[str, Any]:
-    """Create error response message."""
-    return {"type": "error", "code": code, "message": message}
+# Pre-encoded frames for responses that never vary
+TIMEOUT_ERROR = orjson.dumps(
+    {"type": "error", "code": "TIMEOUT", "message": "タイムアウトしました"}
+)
+NOT_START_ENROLLMENT_ERROR = orjson.dumps(
+    {
+        "type": "error",
+        "code": "INVALID_MESSAGE",
+        "message": "最初のメッセージはstart_enrollmentである必要があります",
+    }
+)
+AUDIO_EXPECTED_ERROR = orjson.dumps(
+    {
+        "type": "error",
+        "code": "INVALID_MESSAGE",
+        "message": "音声データ（バイナリ）が期待されています",
+    }
+)
+VOICE_INCOMPLETE_ERROR = orjson.dumps(
+    {
+        "type": "error",
+        "code": "ENROLLMENT_FAILED",
+        "message": "音声登録が完了していません",
+    }
+)
+AUDIO_TOO_LARGE_ERROR = orjson.dumps(
+    {
+        "type": "error",
+        "code": "AUDIO_TOO_LARGE",
+        "message": "音声データが大きすぎます",
+    }
+)
+NOT_REGISTER_PIN_ERROR = orjson.dumps(
+    {
+        "type": "error",
+        "code": "INVALID_MESSAGE",
+        "message": "register_pinメッセージが期待されています",
+    }
+)
 
 
-def create_prompts_response(
-    speaker_id: str,
-    prompts: list[str],
-    current_set: int,
-) -> dict[str, Any]:
-    """Create prompts response message."""
-    return {
-        "type": "prompts",
-        "speaker_id": speaker_id,
-        "prompts": prompts,
-        "total_sets": len(prompts),
-        "current_set": current_set,
-    }
+async def receive_control_message(websocket: WebSocket) -> str | bytes:
+    """Receive a JSON control message from a text or binary frame.
 
+    The payload is returned as delivered by the server, so it can be handed
+    to ``model_validate_json`` without an extra decode or encode.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    text = message.get("text")
+    return text if text is not None else message["bytes"]
 
-def create_asr_result_response(
-    success: bool,
-    asr_result: str,
-    set_index: int,
-    remaining_sets: int,
-    message: str,
-    retry_count: int = 0,
-    max_retries: int = 5,
-) -> dict[str, Any]:
-    """Create ASR result response message."""
-    response: dict[str, Any] = {
-        "type": "asr_result",
-        "success": success,
-        "asr_result": asr_result,
-        "set_index": set_index,
-        "remaining_sets": remaining_sets,
-        "message": message,
-    }
-    if not success:
-        response["retry_count"] = retry_count
-        response["max_retries"] = max_retries
-    return response
-
-
-def create_enrollment_complete_response(
-    speaker_id: str,
-    has_pin: bool,
-) -> dict[str, Any]:
-    """Create enrollment complete response message."""
-    return {
-        "type": "enrollment_complete",
-        "speaker_id": speaker_id,
-        "has_pin": has_pin,
-        "status": "registered",
-    }
 
+async def receive_audio_frame(websocket: WebSocket) -> bytes | None:
+    """Receive the next frame where binary audio is expected.
 
-async def send_json(websocket: WebSocket, data: dict[str, Any]) -> None:
-    """Send JSON message through WebSocket."""
-    await websocket.send_text(json.dumps(data, ensure_ascii=False))
+    Returns:
+        The audio bytes, or None if the client sent a text frame instead.
 
+    Raises:
+        WebSocketDisconnect: If the client disconnected.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    return message.get("bytes")
 
-def get_audio_processor() -> Any:
-    """Get audio processor instance.
 
-    Note: This is a placeholder. The actual implementation
-    would use proper dependency injection.
+class WebSocketWriter:
+    """Per-connection writer task draining a bounded outbound queue.
+
+    Handlers hand messages to the writer instead of awaiting the socket
+    themselves. Each message is sent as its own JSON text frame, in order.
+    When the queue is full, send waits for the writer to catch up, so a
+    client that floods requests without reading is slowed down rather than
+    buffered without limit. Messages may be dicts or already-encoded JSON
+    bytes.
     """
-    # Import here to avoid circular imports
-    from voiceauth.app.model_loader import get_asr, get_vad, get_voiceprint
-    from voiceauth.audio import AudioConverter
-
-    # Create a simple processor wrapper
-    class AudioProcessorWrapper:
-        def __init__(self) -> None:
-            self.converter = AudioConverter()
-            self.vad = get_vad()
-            self.asr = get_asr()
-            self.voiceprint = get_voiceprint()
-
-        def process_webm(self, webm_data: bytes) -> tuple[Any, int]:
-            return self.converter.webm_to_pcm(webm_data)
-
-        def process_enrollment_audio(self, audio: Any, expected_prompt: str) -> Any:
-            # Run ASR
-            asr_result = self.asr.recognize(audio)
-
-            # Check if recognized digits match expected
-            if asr_result.normalized_text != expected_prompt:
-                raise ValueError(
-                    f"Expected '{expected_prompt}', got '{asr_result.normalized_text}'"
-                )
 
-            # Extract speech-only audio via VAD, then compute embedding
+    def __init__(self, websocket: WebSocket, maxsize: int = 32) -> None:
+        self._websocket = websocket
+        self._queue: asyncio.Queue[dict[str, Any] | bytes] = asyncio.Queue(maxsize)
+        self._task = asyncio.create_task(self._run())
+
+    async def send(self, data: dict[str, Any] | bytes) -> None:
+        """Queue a message, waiting while the queue is full.
+
+        Returns without queuing once the writer has stopped (the connection
+        is gone), so a full queue can never block the handler forever.
+        """
+        if self._task.done():
+            return
+        put = asyncio.ensure_future(self._queue.put(data))
+        await asyncio.wait({put, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            message = await self._queue.get()
+            payload = message if isinstance(message, bytes) else orjson.dumps(message)
+            try:
+                await self._websocket.send_text(payload.decode())
+            except Exception:
+                # Connection is gone; the handler sees it on its next receive
+                return
+            finally:
+                self._queue.task_done()
+
+    async def aclose(self) -> None:
+        """Wait for queued messages to be sent, then stop the writer task."""
+        if not self._task.done():
+            drained = asyncio.ensure_future(self._queue.join())
+            await asyncio.wait(
+                {drained, self._task}, return_when=asyncio.FIRST_COMPLETED
+            )
+            drained.cancel()
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await self._task
+
+
+@dataclass(slots=True, frozen=True)
+class ProcessingResult:
+    """Result of processing one enrollment utterance."""
+
+    asr_text: str
+    digits: str
+    utterance_embedding: Any
+
+
+class AudioProcessorWrapper:
+    """Audio processor combining the converter and the shared models."""
+
+    def __init__(self) -> None:
+        self.converter = AudioConverter()
+        self.vad = get_vad()
+        self.asr = get_asr()
+        self.voiceprint = get_voiceprint()
+
+    def process_webm(self, webm_data: bytes) -> tuple[Any, int]:
+        return self.converter.webm_to_pcm(webm_data)
+
+    def process_enrollment_audio(self, audio: Any, expected_prompt: str) -> Any:
+        # Extract speech-only audio via VAD first, so silent takes skip ASR.
+        # Like a digit mismatch, they are a retryable failure of the set.
+        try:
             speech_audio = self.vad.extract_speech(audio)
-            embedding = self.voiceprint.extract(speech_audio)
-
-            # Create result object
-            class ProcessingResult:
-                def __init__(
-                    self, text: str, digits: str, utterance_embedding: Any
-                ) -> None:
-                    self._asr_text = text
-                    self._digits = digits
-                    self._utterance_embedding = utterance_embedding
-
-                @property
-                def asr_text(self) -> str:
-                    return self._asr_text
-
-                @property
-                def digits(self) -> str:
-                    return self._digits
-
-                @property
-                def utterance_embedding(self) -> Any:
-                    return self._utterance_embedding
-
-            return ProcessingResult(
-                asr_result.text, asr_result.normalized_text, embedding
+        except NoSpeechDetectedError:
+            speech_audio = audio[:0]
+        min_samples = int(
+            engine_settings.vad_min_speech_duration * engine_settings.target_sample_rate
+        )
+        if len(speech_audio) < min_samples:
+            raise ValueError("Not enough speech detected")
+
+        # Run ASR on the (shorter) speech-only audio
+        asr_result = self.asr.recognize(speech_audio)
+
+        # Check if recognized digits match expected
+        if asr_result.normalized_text != expected_prompt:
+            raise ValueError(
+                f"Expected '{expected_prompt}', got '{asr_result.normalized_text}'"
             )
 
-    return AudioProcessorWrapper()
+        # Compute embedding from the same speech audio
+        embedding = self.voiceprint.extract(speech_audio)
+
+        return ProcessingResult(asr_result.text, asr_result.normalized_text, embedding)
+
+
+# Shared audio processor instance (built lazily on first connection)
+_audio_processor: AudioProcessorWrapper | None = None
+_audio_processor_lock = threading.Lock()
+
+
+def create_progress_cache() -> EnrollmentProgressCache:
+    """Create the cache of interrupted enrollments for this process.
+
+    Progress is kept in process memory, so with several uvicorn workers a
+    reconnect can land on a worker that never saw the session. Resume is
+    disabled then (a reconnect starts over) rather than failing at random.
+    """
+    if settings.workers > 1:
+        return EnrollmentProgressCache(ttl=0)
+    return EnrollmentProgressCache()
+
+
+# Progress of interrupted enrollments, resumable on reconnect
+progress_cache = create_progress_cache()
+
+
+def get_audio_processor() -> AudioProcessorWrapper:
+    """Get the shared audio processor instance.
+
+    Note: This is a placeholder. The actual implementation
+    would use proper dependency injection.
+    """
+    global _audio_processor
+    if _audio_processor is None:
+        with _audio_processor_lock:
+            if _audio_processor is None:
+                _audio_processor = AudioProcessorWrapper()
+    return _audio_processor
 
 
 @router.websocket("/ws/enrollment")
@@ -171,7 +262,12 @@ async def enrollment_websocket(websocket: WebSocket) -> None:
     Protocol:
     1. Client connects
     2. Client sends JSON: {"type": "start_enrollment", "speaker_id": "...", ...}
-    3. Server sends JSON: {"type": "prompts", "prompts": [...], ...}
+       (control messages may be sent as text or binary frames)
+    3. Server sends JSON: {"type": "prompts", "prompts": [...],
+       "resume_token": "...", ...}
+       (on reconnect within the resume TTL, a start_enrollment carrying the
+       last resume_token gets the same prompts with current_set pointing at
+       the first unfinished set, and a new resume_token)
     4. For each prompt (5 sets):
        4.1 Client sends Binary: WebM audio data
        4.2 Server sends JSON: {"type": "asr_result", "success": true/false, ...}
@@ -184,208 +280,196 @@ async def enrollment_websocket(websocket: WebSocket) -> None:
 
     session: EnrollmentSession | None = None
     enrollment_service: EnrollmentService | None = None
+    writer = WebSocketWriter(websocket)
 
     try:
         # Wait for start_enrollment message with timeout
         try:
-            message = await asyncio.wait_for(
-                websocket.receive_text(),
-                timeout=settings.websocket_timeout,
-            )
+            async with asyncio.timeout(settings.websocket_timeout):
+                message = await receive_control_message(websocket)
         except TimeoutError:
-            await send_json(
-                websocket,
-                create_error_response("TIMEOUT", "タイムアウトしました"),
-            )
+            await writer.send(TIMEOUT_ERROR)
             return
 
         # Parse start message
         try:
-            data = json.loads(message)
-            if data.get("type") != "start_enrollment":
-                await send_json(
-                    websocket,
-                    create_error_response(
-                        "INVALID_MESSAGE",
-                        "最初のメッセージはstart_enrollmentである必要があります",
-                    ),
-                )
+            start_msg = StartEnrollmentMessage.model_validate_json(message)
+            if start_msg.type != "start_enrollment":
+                await writer.send(NOT_START_ENROLLMENT_ERROR)
                 return
-
-            start_msg = StartEnrollmentMessage(**data)
-        except (json.JSONDecodeError, ValidationError) as e:
-            await send_json(
-                websocket,
-                create_error_response("INVALID_MESSAGE", f"無効なメッセージ: {e}"),
+        except ValidationError as e:
+            await writer.send(
+                {
+                    "type": "error",
+                    "code": "INVALID_MESSAGE",
+                    "message": f"無効なメッセージ: {e}",
+                }
             )
             return
 
-        # Create enrollment service with database session
-        with Session(engine) as db_session:
-            speaker_store = SpeakerStore(db_session)
-            audio_processor = get_audio_processor()
-            enrollment_service = EnrollmentService(audio_processor, speaker_store)
+        audio_processor = get_audio_processor()
 
-            # Start enrollment
-            try:
+        # Start enrollment (DB session held only for the existence check)
+        try:
+            with Session(engine) as db_session:
+                enrollment_service = EnrollmentService(
+                    audio_processor, SpeakerStore(db_session), progress_cache
+                )
                 session = enrollment_service.start_enrollment(
                     speaker_id=start_msg.speaker_id,
                     speaker_name=start_msg.speaker_name,
+                    resume_token=start_msg.resume_token,
                 )
-            except SpeakerAlreadyExistsError:
-                await send_json(
-                    websocket,
-                    create_error_response(
-                        "SPEAKER_ALREADY_EXISTS",
-                        f"Speaker '{start_msg.speaker_id}' は既に登録されています",
-                    ),
-                )
-                return
-
-            # Send prompts
-            await send_json(
-                websocket,
-                create_prompts_response(
-                    speaker_id=session.speaker_id,
-                    prompts=session.prompts,
-                    current_set=0,
-                ),
+        except SpeakerAlreadyExistsError:
+            await writer.send(
+                {
+                    "type": "error",
+                    "code": "SPEAKER_ALREADY_EXISTS",
+                    "message": f"Speaker '{start_msg.speaker_id}' は既に登録されています",
+                }
             )
+            return
 
-            # Process audio for each prompt set
-            while session.current_set_index < len(session.prompts):
-                if session.state == EnrollmentState.FAILED:
-                    await send_json(
-                        websocket,
-                        create_error_response(
-                            "ENROLLMENT_FAILED",
-                            session.error_message or "登録に失敗しました",
-                        ),
-                    )
-                    return
-
-                # Wait for audio data
-                try:
-                    message = await asyncio.wait_for(
-                        websocket.receive(),
-                        timeout=settings.websocket_timeout,
-                    )
-                except TimeoutError:
-                    await send_json(
-                        websocket,
-                        create_error_response("TIMEOUT", "タイムアウトしました"),
-                    )
-                    return
-
-                # Handle binary (audio) or text (JSON) message
-                if "bytes" in message:
-                    audio_data = message["bytes"]
-
-                    # Process audio
-                    result = enrollment_service.process_audio(session, audio_data)
-
-                    # Send ASR result
-                    await send_json(
-                        websocket,
-                        create_asr_result_response(
-                            success=result.success,
-                            asr_result=result.asr_text,
-                            set_index=result.set_index,
-                            remaining_sets=result.remaining_sets,
-                            message=result.message,
-                            retry_count=result.retry_count,
-                            max_retries=result.max_retries,
-                        ),
-                    )
-
-                elif "text" in message:
-                    # Unexpected text message during audio recording
-                    await send_json(
-                        websocket,
-                        create_error_response(
-                            "INVALID_MESSAGE",
-                            "音声データ（バイナリ）が期待されています",
-                        ),
-                    )
-
-            # Voice enrollment complete, wait for PIN
-            if session.state != EnrollmentState.COMPLETED_VOICE:
-                await send_json(
-                    websocket,
-                    create_error_response(
-                        "ENROLLMENT_FAILED",
-                        "音声登録が完了していません",
-                    ),
+        # Send prompts
+        await writer.send(
+            {
+                "type": "prompts",
+                "speaker_id": session.speaker_id,
+                "prompts": session.prompts,
+                "total_sets": len(session.prompts),
+                "current_set": session.current_set_index,
+                "resume_token": session.resume_token,
+            }
+        )
+
+        # Process audio for each prompt set
+        while session.current_set_index < len(session.prompts):
+            if session.state == EnrollmentState.FAILED:
+                await writer.send(
+                    {
+                        "type": "error",
+                        "code": "ENROLLMENT_FAILED",
+                        "message": session.error_message or "登録に失敗しました",
+                    }
                 )
                 return
 
-            # Wait for PIN registration
+            # Wait for audio data
             try:
-                message = await asyncio.wait_for(
-                    websocket.receive_text(),
-                    timeout=settings.websocket_timeout,
-                )
+                async with asyncio.timeout(settings.websocket_timeout):
+                    audio_data = await receive_audio_frame(websocket)
             except TimeoutError:
-                await send_json(
-                    websocket,
-                    create_error_response("TIMEOUT", "タイムアウトしました"),
-                )
+                await writer.send(TIMEOUT_ERROR)
                 return
 
-            # Parse PIN message
-            try:
-                data = json.loads(message)
-                if data.get("type") != "register_pin":
-                    await send_json(
-                        websocket,
-                        create_error_response(
-                            "INVALID_MESSAGE",
-                            "register_pinメッセージが期待されています",
-                        ),
-                    )
-                    return
-
-                pin_msg = RegisterPINMessage(**data)
-            except (json.JSONDecodeError, ValidationError) as e:
-                await send_json(
-                    websocket,
-                    create_error_response("INVALID_MESSAGE", f"無効なメッセージ: {e}"),
-                )
+            if audio_data is None:
+                # Unexpected text message during audio recording
+                await writer.send(AUDIO_EXPECTED_ERROR)
+                continue
+
+            if len(audio_data) > settings.max_audio_bytes:
+                await writer.send(AUDIO_TOO_LARGE_ERROR)
+                continue
+
+            # Process audio off the event loop (decode + model inference)
+            result = await asyncio.to_thread(
+                enrollment_service.process_audio, session, audio_data
+            )
+
+            # Send ASR result
+            response: dict[str, Any] = {
+                "type": "asr_result",
+                "success": result.success,
+                "asr_result": result.asr_text,
+                "set_index": result.set_index,
+                "remaining_sets": result.remaining_sets,
+                "message": result.message,
+            }
+            if not result.success:
+                response["retry_count"] = result.retry_count
+                response["max_retries"] = result.max_retries
+            await writer.send(response)
+
+        # Voice enrollment complete, wait for PIN
+        if session.state != EnrollmentState.COMPLETED_VOICE:
+            await writer.send(VOICE_INCOMPLETE_ERROR)
+            return
+
+        # Wait for PIN registration
+        try:
+            async with asyncio.timeout(settings.websocket_timeout):
+                message = await receive_control_message(websocket)
+        except TimeoutError:
+            await writer.send(TIMEOUT_ERROR)
+            return
+
+        # Parse PIN message
+        try:
+            pin_msg = RegisterPINMessage.model_validate_json(message)
+            if pin_msg.type != "register_pin":
+                await writer.send(NOT_REGISTER_PIN_ERROR)
                 return
+        except ValidationError as e:
+            await writer.send(
+                {
+                    "type": "error",
+                    "code": "INVALID_MESSAGE",
+                    "message": f"無効なメッセージ: {e}",
+                }
+            )
+            return
 
-            # Complete enrollment with PIN
-            try:
+        # Complete enrollment with PIN (fresh DB session for the writes)
+        try:
+            with Session(engine) as db_session:
+                enrollment_service = EnrollmentService(
+                    audio_processor, SpeakerStore(db_session), progress_cache
+                )
                 result = enrollment_service.complete_enrollment(
                     session=session,
                     pin=pin_msg.pin if pin_msg.pin else None,
                 )
 
-                await send_json(
-                    websocket,
-                    create_enrollment_complete_response(
-                        speaker_id=result.speaker_id,
-                        has_pin=result.has_pin,
-                    ),
-                )
-            except ValueError as e:
-                await send_json(
-                    websocket,
-                    create_error_response("INVALID_PIN", str(e)),
-                )
-                return
+            await writer.send(
+                {
+                    "type": "enrollment_complete",
+                    "speaker_id": result.speaker_id,
+                    "has_pin": result.has_pin,
+                    "status": "registered",
+                }
+            )
+        except SpeakerAlreadyExistsError:
+            # Registered by another connection since start_enrollment
+            await writer.send(
+                {
+                    "type": "error",
+                    "code": "SPEAKER_ALREADY_EXISTS",
+                    "message": f"Speaker '{session.speaker_id}' は既に登録されています",
+                }
+            )
+            return
+        except ValueError as e:
+            await writer.send(
+                {"type": "error", "code": "INVALID_PIN", "message": str(e)}
+            )
+            return
 
     except WebSocketDisconnect:
         # Client disconnected - cleanup is handled automatically
         pass
     except Exception as e:
         try:
-            await send_json(
-                websocket,
-                create_error_response("INTERNAL_ERROR", f"内部エラー: {e}"),
+            await writer.send(
+                {
+                    "type": "error",
+                    "code": "INTERNAL_ERROR",
+                    "message": f"内部エラー: {e}",
+                }
             )
         except Exception:
             pass
     finally:
+        await writer.aclose()
         try:
             await websocket.close()
         except Exception:
@@ -1,6 +1,7 @@
 """Tests for WebSocket enrollment endpoint."""
 
 import json
+from contextlib import ExitStack
 from unittest.mock import MagicMock, patch
 
 import numpy as np
@@ -8,6 +9,14 @@ import pytest
 from fastapi.testclient import TestClient
 
 from voiceauth.app.main import create_app
+from voiceauth.app.websocket import enrollment as enrollment_module
+from voiceauth.database import exceptions as store_errors
+from voiceauth.domain_service import EnrollmentSession
+from voiceauth.domain_service.settings import settings as domain_settings
+from voiceauth.engine.exceptions import NoSpeechDetectedError
+
+# Seeded generator drawing float32 directly (no float64 buffer + cast)
+rng = np.random.default_rng(42)
 
 
 @pytest.fixture
@@ -32,7 +41,7 @@ def mock_audio_processor():
     mock_result = MagicMock()
     mock_result.asr_text = "1234567890"
     mock_result.digits = "1234567890"
-    mock_result.utterance_embedding = np.random.randn(192).astype(np.float32)
+    mock_result.utterance_embedding = rng.standard_normal(192, dtype=np.float32)
     processor.process_enrollment_audio.return_value = mock_result
 
     return processor
@@ -43,11 +52,36 @@ def mock_speaker_store():
     """Create mock speaker store."""
     store = MagicMock()
     store.speaker_exists.return_value = False
-    store.create_speaker.return_value = MagicMock()
-    store.add_voiceprint.return_value = MagicMock()
+    store.create_speaker_with_voiceprint.return_value = MagicMock()
     return store
 
 
+@pytest.fixture
+def mock_engines():
+    """Create mock VAD/ASR/voiceprint engines."""
+    vad = MagicMock()
+    vad.extract_speech.return_value = np.zeros(16000, dtype=np.float32)
+    asr = MagicMock()
+    voiceprint = MagicMock()
+    voiceprint.extract.return_value = rng.standard_normal(192, dtype=np.float32)
+    return {"vad": vad, "asr": asr, "voiceprint": voiceprint}
+
+
+@pytest.fixture
+def real_audio_processor(mock_engines):
+    """Create the endpoint's real audio processor on top of mock engines."""
+    with ExitStack() as stack:
+        for name, engine in mock_engines.items():
+            stack.enter_context(
+                patch.object(enrollment_module, f"get_{name}", return_value=engine)
+            )
+        processor = enrollment_module.AudioProcessorWrapper()
+    processor.process_webm = MagicMock(
+        return_value=(np.zeros(16000, dtype=np.float32), 16000)
+    )
+    return processor
+
+
 class TestEnrollmentWebSocket:
     """Tests for /ws/enrollment endpoint."""
 
@@ -110,6 +144,14 @@ class TestEnrollmentWebSocket:
                 assert data["has_pin"] is True
                 assert data["status"] == "registered"
 
+            # Speaker and voiceprint are saved together in one call
+            mock_speaker_store.create_speaker_with_voiceprint.assert_called_once()
+            call = mock_speaker_store.create_speaker_with_voiceprint.call_args
+            assert call.kwargs["speaker_id"] == "test-speaker-001"
+            assert call.kwargs["pin_hash"] is not None
+            mock_speaker_store.create_speaker.assert_not_called()
+            mock_speaker_store.add_voiceprint.assert_not_called()
+
     def test_enrollment_without_pin(
         self, client, mock_audio_processor, mock_speaker_store
     ):
@@ -193,6 +235,68 @@ class TestEnrollmentWebSocket:
                 assert data["type"] == "error"
                 assert data["code"] == "SPEAKER_ALREADY_EXISTS"
 
+    def test_speaker_registered_during_enrollment(
+        self, client, mock_audio_processor, mock_speaker_store
+    ):
+        """Test error when the speaker is created before enrollment completes."""
+        mock_speaker_store.create_speaker_with_voiceprint.side_effect = (
+            store_errors.SpeakerAlreadyExistsError(
+                "Speaker 'race-speaker' already exists"
+            )
+        )
+
+        with (
+            patch(
+                "voiceauth.app.websocket.enrollment.get_audio_processor",
+                return_value=mock_audio_processor,
+            ),
+            patch("voiceauth.app.websocket.enrollment.Session") as mock_session_class,
+            patch(
+                "voiceauth.app.websocket.enrollment.SpeakerStore",
+                return_value=mock_speaker_store,
+            ),
+        ):
+            mock_db_session = MagicMock()
+            mock_session_class.return_value.__enter__ = MagicMock(
+                return_value=mock_db_session
+            )
+            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
+
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(
+                    json.dumps(
+                        {"type": "start_enrollment", "speaker_id": "race-speaker"}
+                    )
+                )
+                data = json.loads(websocket.receive_text())
+                assert data["type"] == "prompts"
+                token = data["resume_token"]
+
+                for _ in range(5):
+                    websocket.send_bytes(b"fake-webm-audio-data")
+                    data = json.loads(websocket.receive_text())
+                    assert data["success"] is True
+
+                websocket.send_text(json.dumps({"type": "register_pin", "pin": ""}))
+
+                data = json.loads(websocket.receive_text())
+                assert data["type"] == "error"
+                assert data["code"] == "SPEAKER_ALREADY_EXISTS"
+
+            # The saved progress was discarded with the failed enrollment
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(
+                    json.dumps(
+                        {
+                            "type": "start_enrollment",
+                            "speaker_id": "race-speaker",
+                            "resume_token": token,
+                        }
+                    )
+                )
+                data = json.loads(websocket.receive_text())
+                assert data["current_set"] == 0
+
     def test_invalid_first_message(self, client):
         """Test error when first message is not start_enrollment."""
         with client.websocket_connect("/ws/enrollment") as websocket:
@@ -221,7 +325,7 @@ class TestEnrollmentWebSocket:
         mock_result = MagicMock()
         mock_result.asr_text = "1234567890"
         mock_result.digits = "1234567890"
-        mock_result.utterance_embedding = np.random.randn(192).astype(np.float32)
+        mock_result.utterance_embedding = rng.standard_normal(192, dtype=np.float32)
 
         call_count = [0]
 
@@ -355,3 +459,472 @@ class TestEnrollmentWebSocket:
                 assert data["type"] == "error"
                 assert data["code"] == "INVALID_MESSAGE"
                 assert "バイナリ" in data["message"]
+
+    def test_retries_exhausted_sends_one_object_per_frame(
+        self, client, mock_audio_processor, mock_speaker_store
+    ):
+        """Test final ASR result and failure error arrive as separate objects."""
+        mock_audio_processor.process_enrollment_audio.side_effect = ValueError(
+            "ASR failed"
+        )
+
+        with (
+            patch(
+                "voiceauth.app.websocket.enrollment.get_audio_processor",
+                return_value=mock_audio_processor,
+            ),
+            patch("voiceauth.app.websocket.enrollment.Session") as mock_session_class,
+            patch(
+                "voiceauth.app.websocket.enrollment.SpeakerStore",
+                return_value=mock_speaker_store,
+            ),
+        ):
+            mock_db_session = MagicMock()
+            mock_session_class.return_value.__enter__ = MagicMock(
+                return_value=mock_db_session
+            )
+            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
+
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(
+                    json.dumps(
+                        {"type": "start_enrollment", "speaker_id": "test-speaker-006"}
+                    )
+                )
+
+                # Receive prompts
+                websocket.receive_text()
+
+                # Every attempt produces a single asr_result object
+                for _ in range(domain_settings.enrollment_max_retries):
+                    websocket.send_bytes(b"fake-webm-audio-data")
+                    asr_result = json.loads(websocket.receive_text())
+                    assert asr_result["type"] == "asr_result"
+                    assert asr_result["success"] is False
+                assert asr_result["retry_count"] == asr_result["max_retries"]
+
+                # The failure follows in its own frame
+                error = json.loads(websocket.receive_text())
+                assert error["type"] == "error"
+                assert error["code"] == "ENROLLMENT_FAILED"
+
+    def test_flood_of_text_frames_is_answered_in_order(
+        self, client, mock_audio_processor, mock_speaker_store
+    ):
+        """Test more error replies than the writer queue holds do not break."""
+        with (
+            patch(
+                "voiceauth.app.websocket.enrollment.get_audio_processor",
+                return_value=mock_audio_processor,
+            ),
+            patch("voiceauth.app.websocket.enrollment.Session") as mock_session_class,
+            patch(
+                "voiceauth.app.websocket.enrollment.SpeakerStore",
+                return_value=mock_speaker_store,
+            ),
+        ):
+            mock_db_session = MagicMock()
+            mock_session_class.return_value.__enter__ = MagicMock(
+                return_value=mock_db_session
+            )
+            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
+
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(
+                    json.dumps(
+                        {"type": "start_enrollment", "speaker_id": "test-speaker-012"}
+                    )
+                )
+                websocket.receive_text()
+
+                # Flood text frames without reading the replies
+                for _ in range(100):
+                    websocket.send_text("not audio")
+                for _ in range(100):
+                    data = json.loads(websocket.receive_text())
+                    assert data["type"] == "error"
+                    assert data["code"] == "INVALID_MESSAGE"
+
+                # The session is still usable
+                websocket.send_bytes(b"fake-webm-audio-data")
+                data = json.loads(websocket.receive_text())
+                assert data["type"] == "asr_result"
+                assert data["success"] is True
+
+    def test_audio_phase_rejects_text_and_oversized_frames(
+        self, client, mock_audio_processor, mock_speaker_store, monkeypatch
+    ):
+        """Test text and oversized frames are rejected and the set is retried."""
+        monkeypatch.setattr(enrollment_module.settings, "max_audio_bytes", 32)
+
+        with (
+            patch(
+                "voiceauth.app.websocket.enrollment.get_audio_processor",
+                return_value=mock_audio_processor,
+            ),
+            patch("voiceauth.app.websocket.enrollment.Session") as mock_session_class,
+            patch(
+                "voiceauth.app.websocket.enrollment.SpeakerStore",
+                return_value=mock_speaker_store,
+            ),
+        ):
+            mock_db_session = MagicMock()
+            mock_session_class.return_value.__enter__ = MagicMock(
+                return_value=mock_db_session
+            )
+            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
+
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(
+                    json.dumps(
+                        {"type": "start_enrollment", "speaker_id": "test-speaker-013"}
+                    )
+                )
+                websocket.receive_text()
+
+                websocket.send_text(json.dumps({"type": "unexpected"}))
+                data = json.loads(websocket.receive_text())
+                assert data["code"] == "INVALID_MESSAGE"
+                assert "バイナリ" in data["message"]
+
+                websocket.send_bytes(b"x" * 33)
+                data = json.loads(websocket.receive_text())
+                assert data["code"] == "AUDIO_TOO_LARGE"
+
+                websocket.send_bytes(b"fake-webm-audio-data")
+                data = json.loads(websocket.receive_text())
+                assert data["type"] == "asr_result"
+                assert data["set_index"] == 0
+
+            mock_audio_processor.process_webm.assert_called_once()
+
+    def test_start_enrollment_as_binary_frame(
+        self, client, mock_audio_processor, mock_speaker_store
+    ):
+        """Test control messages are accepted in binary frames."""
+        with (
+            patch(
+                "voiceauth.app.websocket.enrollment.get_audio_processor",
+                return_value=mock_audio_processor,
+            ),
+            patch("voiceauth.app.websocket.enrollment.Session") as mock_session_class,
+            patch(
+                "voiceauth.app.websocket.enrollment.SpeakerStore",
+                return_value=mock_speaker_store,
+            ),
+        ):
+            mock_db_session = MagicMock()
+            mock_session_class.return_value.__enter__ = MagicMock(
+                return_value=mock_db_session
+            )
+            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
+
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_bytes(
+                    json.dumps(
+                        {"type": "start_enrollment", "speaker_id": "test-speaker-007"}
+                    ).encode()
+                )
+
+                data = json.loads(websocket.receive_text())
+                assert data["type"] == "prompts"
+                assert data["speaker_id"] == "test-speaker-007"
+
+    def test_reconnect_resumes_enrollment(
+        self, client, mock_audio_processor, mock_speaker_store
+    ):
+        """Test a dropped enrollment resumes at the next unfinished set."""
+        with (
+            patch(
+                "voiceauth.app.websocket.enrollment.get_audio_processor",
+                return_value=mock_audio_processor,
+            ),
+            patch("voiceauth.app.websocket.enrollment.Session") as mock_session_class,
+            patch(
+                "voiceauth.app.websocket.enrollment.SpeakerStore",
+                return_value=mock_speaker_store,
+            ),
+        ):
+            mock_db_session = MagicMock()
+            mock_session_class.return_value.__enter__ = MagicMock(
+                return_value=mock_db_session
+            )
+            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
+            start = json.dumps(
+                {"type": "start_enrollment", "speaker_id": "test-speaker-008"}
+            )
+
+            # First connection: complete two sets, then drop
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(start)
+                first = json.loads(websocket.receive_text())
+                assert first["current_set"] == 0
+                for _ in range(2):
+                    websocket.send_bytes(b"fake-webm-audio-data")
+                    websocket.receive_text()
+
+            # Reconnect with the resume token: same prompts, continue from set 2
+            resume = json.dumps(
+                {
+                    "type": "start_enrollment",
+                    "speaker_id": "test-speaker-008",
+                    "resume_token": first["resume_token"],
+                }
+            )
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(resume)
+                data = json.loads(websocket.receive_text())
+                assert data["type"] == "prompts"
+                assert data["prompts"] == first["prompts"]
+                assert data["current_set"] == 2
+                assert data["resume_token"] != first["resume_token"]
+
+                for _ in range(3):
+                    websocket.send_bytes(b"fake-webm-audio-data")
+                    websocket.receive_text()
+
+                websocket.send_text(json.dumps({"type": "register_pin", "pin": ""}))
+                data = json.loads(websocket.receive_text())
+                assert data["type"] == "enrollment_complete"
+
+            assert mock_audio_processor.process_enrollment_audio.call_count == 5
+
+    def test_resume_requires_own_token(
+        self, client, mock_audio_processor, mock_speaker_store
+    ):
+        """Test progress is not handed to a connection without its token."""
+        with (
+            patch(
+                "voiceauth.app.websocket.enrollment.get_audio_processor",
+                return_value=mock_audio_processor,
+            ),
+            patch("voiceauth.app.websocket.enrollment.Session") as mock_session_class,
+            patch(
+                "voiceauth.app.websocket.enrollment.SpeakerStore",
+                return_value=mock_speaker_store,
+            ),
+        ):
+            mock_db_session = MagicMock()
+            mock_session_class.return_value.__enter__ = MagicMock(
+                return_value=mock_db_session
+            )
+            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
+
+            # Victim completes two sets, then drops
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(
+                    json.dumps(
+                        {"type": "start_enrollment", "speaker_id": "test-speaker-009"}
+                    )
+                )
+                first = json.loads(websocket.receive_text())
+                for _ in range(2):
+                    websocket.send_bytes(b"fake-webm-audio-data")
+                    websocket.receive_text()
+
+            # Same speaker_id without a token, or with a forged one: fresh start
+            for token in (None, "forged-token"):
+                with client.websocket_connect("/ws/enrollment") as websocket:
+                    websocket.send_text(
+                        json.dumps(
+                            {
+                                "type": "start_enrollment",
+                                "speaker_id": "test-speaker-009",
+                                "resume_token": token,
+                            }
+                        )
+                    )
+                    data = json.loads(websocket.receive_text())
+                    assert data["current_set"] == 0
+                    assert data["resume_token"] != first["resume_token"]
+
+            # The victim's token does not work for another speaker_id
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(
+                    json.dumps(
+                        {
+                            "type": "start_enrollment",
+                            "speaker_id": "test-speaker-010",
+                            "resume_token": first["resume_token"],
+                        }
+                    )
+                )
+                data = json.loads(websocket.receive_text())
+                assert data["current_set"] == 0
+
+            # The victim can still resume with their own token
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(
+                    json.dumps(
+                        {
+                            "type": "start_enrollment",
+                            "speaker_id": "test-speaker-009",
+                            "resume_token": first["resume_token"],
+                        }
+                    )
+                )
+                data = json.loads(websocket.receive_text())
+                assert data["current_set"] == 2
+
+    def test_resume_keeps_retry_count(
+        self, client, mock_audio_processor, mock_speaker_store
+    ):
+        """Test reconnecting neither resets retries nor revives a failed session."""
+        mock_result = mock_audio_processor.process_enrollment_audio.return_value
+        # One successful set, then every attempt fails
+        mock_audio_processor.process_enrollment_audio.side_effect = [mock_result] + [
+            ValueError("ASR failed")
+        ] * 10
+
+        with (
+            patch(
+                "voiceauth.app.websocket.enrollment.get_audio_processor",
+                return_value=mock_audio_processor,
+            ),
+            patch("voiceauth.app.websocket.enrollment.Session") as mock_session_class,
+            patch(
+                "voiceauth.app.websocket.enrollment.SpeakerStore",
+                return_value=mock_speaker_store,
+            ),
+        ):
+            mock_db_session = MagicMock()
+            mock_session_class.return_value.__enter__ = MagicMock(
+                return_value=mock_db_session
+            )
+            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
+
+            def start(token):
+                return json.dumps(
+                    {
+                        "type": "start_enrollment",
+                        "speaker_id": "test-speaker-011",
+                        "resume_token": token,
+                    }
+                )
+
+            # First connection: one success, two failures, then drop
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(start(None))
+                token = json.loads(websocket.receive_text())["resume_token"]
+                for _ in range(3):
+                    websocket.send_bytes(b"fake-webm-audio-data")
+                    websocket.receive_text()
+
+            # Resume: retries continue from 2 until the limit is reached
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(start(token))
+                data = json.loads(websocket.receive_text())
+                assert data["current_set"] == 1
+                token = data["resume_token"]
+
+                websocket.send_bytes(b"fake-webm-audio-data")
+                data = json.loads(websocket.receive_text())
+                assert data["retry_count"] == 3
+
+                websocket.send_bytes(b"fake-webm-audio-data")
+                websocket.send_bytes(b"fake-webm-audio-data")
+                messages = []
+                while not any(m.get("code") == "ENROLLMENT_FAILED" for m in messages):
+                    messages.append(json.loads(websocket.receive_text()))
+                results = [m for m in messages if m["type"] == "asr_result"]
+                assert results[-1]["retry_count"] == 5
+
+            # The failed session cannot be resumed
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(start(token))
+                data = json.loads(websocket.receive_text())
+                assert data["current_set"] == 0
+
+
+class TestAudioProcessorWrapper:
+    """Tests for the enrollment audio processor."""
+
+    def test_short_speech_skips_models(self, mock_engines, real_audio_processor):
+        """Test a take with too little speech is rejected before ASR."""
+        mock_engines["vad"].extract_speech.return_value = np.zeros(
+            160, dtype=np.float32
+        )
+
+        with pytest.raises(ValueError, match="Not enough speech"):
+            real_audio_processor.process_enrollment_audio(
+                np.zeros(16000, dtype=np.float32), "1234"
+            )
+
+        mock_engines["asr"].recognize.assert_not_called()
+        mock_engines["voiceprint"].extract.assert_not_called()
+
+    def test_no_speech_skips_models(self, mock_engines, real_audio_processor):
+        """Test VAD finding no speech at all fails like too little speech."""
+        mock_engines["vad"].extract_speech.side_effect = NoSpeechDetectedError(
+            "No speech detected in audio"
+        )
+
+        with pytest.raises(ValueError, match="Not enough speech"):
+            real_audio_processor.process_enrollment_audio(
+                np.zeros(16000, dtype=np.float32), "1234"
+            )
+
+        mock_engines["asr"].recognize.assert_not_called()
+        mock_engines["voiceprint"].extract.assert_not_called()
+
+    def test_silent_take_can_be_retried(
+        self, client, mock_engines, real_audio_processor, mock_speaker_store
+    ):
+        """Test a silent take counts as a retry and keeps enrollment open."""
+        mock_engines["vad"].extract_speech.side_effect = NoSpeechDetectedError(
+            "No speech detected in audio"
+        )
+
+        with (
+            patch(
+                "voiceauth.app.websocket.enrollment.get_audio_processor",
+                return_value=real_audio_processor,
+            ),
+            patch("voiceauth.app.websocket.enrollment.Session"),
+            patch(
+                "voiceauth.app.websocket.enrollment.SpeakerStore",
+                return_value=mock_speaker_store,
+            ),
+        ):
+            with client.websocket_connect("/ws/enrollment") as websocket:
+                websocket.send_text(
+                    json.dumps(
+                        {"type": "start_enrollment", "speaker_id": "test-speaker-017"}
+                    )
+                )
+                websocket.receive_text()
+
+                for attempt in (1, 2):
+                    websocket.send_bytes(b"fake-webm-audio-data")
+                    data = json.loads(websocket.receive_text())
+                    assert data["type"] == "asr_result"
+                    assert data["success"] is False
+                    assert data["set_index"] == 0
+                    assert data["retry_count"] == attempt
+
+        mock_engines["asr"].recognize.assert_not_called()
+        mock_engines["voiceprint"].extract.assert_not_called()
+
+
+class TestProgressCache:
+    """Tests for the per-process enrollment progress cache."""
+
+    def test_resume_disabled_with_several_workers(self, monkeypatch):
+        """Test progress is not kept when reconnects may reach another worker."""
+        monkeypatch.setattr(enrollment_module.settings, "workers", 2)
+        cache = enrollment_module.create_progress_cache()
+        session = EnrollmentSession(speaker_id="alice", prompts=["1234"])
+
+        cache.put(session)
+
+        assert cache.take(session.resume_token, "alice") is None
+
+    def test_resume_enabled_with_one_worker(self, monkeypatch):
+        """Test progress is kept for a single worker."""
+        monkeypatch.setattr(enrollment_module.settings, "workers", 1)
+        cache = enrollment_module.create_progress_cache()
+        session = EnrollmentSession(speaker_id="alice", prompts=["1234"])
+
+        cache.put(session)
+
+        assert cache.take(session.resume_token, "alice") is not None
@@ -1,58 +1,214 @@
 """Tests for WebSocket verify endpoint."""
 
-import json
-from unittest.mock import MagicMock, patch
-
+import asyncio
+import hashlib
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Any
+from unittest.mock import MagicMock, Mock, patch
+
+import msgpack
 import numpy as np
+import orjson
 import pytest
 from fastapi.testclient import TestClient
 
-from voiceauth.app.main import create_app
-from voiceauth.domain.models import Speaker
+from voiceauth.app.main import app as _APP
+from voiceauth.app.websocket import verify as verify_module
+from voiceauth.domain.protocols import (
+    VerifyAudioProcessorProtocol,
+    VerifySpeakerStoreProtocol,
+)
+from voiceauth.engine.exceptions import NoSpeechDetectedError
+
+# Shared read-only test data, generated once per module
+VOICEPRINT = np.random.default_rng(0).standard_normal(192, dtype=np.float32)
+SILENT_AUDIO = np.zeros(16000, dtype=np.float32)
+# Symmetric int8 quantization of VOICEPRINT (scale = max|x| / 127)
+VOICEPRINT_INT8 = np.round(VOICEPRINT * (127 / np.abs(VOICEPRINT).max())).astype(
+    np.int8
+)
+PIN = "1234"
+PIN_HASH = hashlib.sha256(PIN.encode()).hexdigest()
+
+# Reuse the application built at import of voiceauth.app.main
+_CLIENT = TestClient(_APP)
+
+
+def dumps(message: Any) -> str:
+    """Encode a message for a text frame."""
+    return orjson.dumps(message).decode()
+
+
+# Client messages, encoded once per module
+START_VERIFY = dumps({"type": "start_verify", "speaker_id": "test-speaker-001"})
+START_VERIFY_NO_PIN = dumps({"type": "start_verify", "speaker_id": "test-speaker-002"})
+START_VERIFY_UNKNOWN = dumps({"type": "start_verify", "speaker_id": "unknown-speaker"})
+VERIFY_PIN = dumps({"type": "verify_pin", "pin": PIN})
+VERIFY_WRONG_PIN = dumps({"type": "verify_pin", "pin": "9999"})
+
+
+@dataclass(slots=True)
+class FakeSpeaker:
+    """Speaker record with only the fields the verify flow reads."""
+
+    speaker_id: str
+    speaker_name: str | None
+    pin_hash: str | None
+
+
+@dataclass(slots=True)
+class FakeVerificationResult:
+    """Verification result returned by the mocked audio processor."""
+
+    asr_text: str
+    asr_matched: bool
+    authenticated: bool
+    similarity_score: float
+
+
+class InProcessWebSocket:
+    """WebSocket client that drives the ASGI app directly on the test's loop.
+
+    Avoids TestClient's portal thread and sync/async bridging: messages are
+    exchanged with the endpoint through two asyncio queues.
+    """
+
+    def __init__(self, app: Any, path: str) -> None:
+        self._app = app
+        self._path = path
+        self._to_app: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self._from_app: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self._task: asyncio.Task[None] | None = None
+
+    async def __aenter__(self) -> "InProcessWebSocket":
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": self._path,
+            "raw_path": self._path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+            "subprotocols": [],
+            "server": ("testserver", 80),
+            "client": ("testclient", 50000),
+        }
+        self._task = asyncio.create_task(
+            self._app(scope, self._to_app.get, self._from_app.put)
+        )
+        await self._to_app.put({"type": "websocket.connect"})
+        message = await self._from_app.get()
+        assert message["type"] == "websocket.accept"
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        assert self._task is not None
+        if not self._task.done():
+            await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        await self._task
+
+    async def send_text(self, text: str) -> None:
+        await self._to_app.put({"type": "websocket.receive", "text": text})
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self._to_app.put({"type": "websocket.receive", "bytes": data})
+
+    async def receive_json(self) -> Any:
+        message = await self._from_app.get()
+        assert message["type"] == "websocket.send"
+        return orjson.loads(message["text"])
 
 
 @pytest.fixture
+def anyio_backend():
+    """Run async tests on asyncio (the endpoint uses asyncio primitives)."""
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
 def app():
-    """Create test application."""
-    return create_app()
+    """Return the shared test application."""
+    return _APP
 
 
-@pytest.fixture
-def client(app):
-    """Create test client."""
-    return TestClient(app)
+@pytest.fixture(scope="session")
+def client():
+    """Return the shared test client."""
+    return _CLIENT
 
 
 @pytest.fixture
 def mock_audio_processor():
     """Create mock audio processor."""
-    processor = MagicMock()
-    processor.process_webm.return_value = (np.zeros(16000, dtype=np.float32), 16000)
+    processor = Mock(spec_set=VerifyAudioProcessorProtocol)
+    processor.process_webm.return_value = (SILENT_AUDIO, 16000)
     return processor
 
 
 @pytest.fixture
 def mock_speaker_store():
     """Create mock speaker store."""
-    store = MagicMock()
+    store = Mock(spec_set=VerifySpeakerStoreProtocol)
     store.speaker_exists.return_value = True
 
-    # Create mock speaker with PIN
-    mock_speaker = MagicMock(spec=Speaker)
-    mock_speaker.speaker_id = "test-speaker-001"
-    mock_speaker.speaker_name = "Test User"
-    # SHA-256 hash of "1234"
-    mock_speaker.pin_hash = (
-        "03ac674216f3e15c761ee1a5e255f067953623c8b388b4459e13f978d7c846f4"
+    # Create speaker with PIN
+    store.get_speaker_by_id.return_value = FakeSpeaker(
+        speaker_id="test-speaker-001",
+        speaker_name="Test User",
+        pin_hash=PIN_HASH,
     )
-    store.get_speaker_by_id.return_value = mock_speaker
+    store.get_pin_hash.return_value = PIN_HASH
 
     # Create mock voiceprint (single utterance-level embedding)
-    store.get_voiceprint.return_value = np.random.randn(192).astype(np.float32)
+    store.get_voiceprint.return_value = VOICEPRINT
 
     return store
 
 
+@pytest.fixture
+def patched_deps(monkeypatch, mock_audio_processor, mock_speaker_store):
+    """Patch the verify endpoint's audio processor, DB session and store."""
+    mock_session_class = MagicMock()
+    mock_session_class.return_value.__enter__.return_value = MagicMock()
+    monkeypatch.setattr(
+        verify_module, "get_audio_processor", lambda: mock_audio_processor
+    )
+    monkeypatch.setattr(verify_module, "Session", mock_session_class)
+    monkeypatch.setattr(
+        verify_module, "SpeakerStore", lambda *args, **kwargs: mock_speaker_store
+    )
+
+
+@pytest.fixture
+def mock_engines():
+    """Create mock VAD/ASR/voiceprint engines that recognize "1234"."""
+    asr = MagicMock()
+    asr.recognize.return_value.normalized_text = "1234"
+    vad = MagicMock()
+    vad.extract_speech.return_value = SILENT_AUDIO
+    voiceprint = MagicMock()
+    voiceprint.extract.return_value = VOICEPRINT
+    return {"asr": asr, "vad": vad, "voiceprint": voiceprint}
+
+
+def build_audio_processor(engines: dict[str, MagicMock]) -> Any:
+    """Build the endpoint's real audio processor on top of mock engines."""
+    with ExitStack() as stack:
+        for name, engine in engines.items():
+            stack.enter_context(
+                patch.object(verify_module, f"get_{name}", return_value=engine)
+            )
+        return verify_module.AudioProcessorWrapper()
+
+
+@pytest.fixture
+def real_audio_processor(mock_engines):
+    """Create the endpoint's real audio processor on top of mock engines."""
+    return build_audio_processor(mock_engines)
+
+
 def create_mock_verification_result(
     asr_text: str,
     asr_matched: bool,
@@ -60,19 +216,43 @@ def create_mock_verification_result(
     similarity_score: float = 0.0,
 ):
     """Create a mock verification result."""
-    result = MagicMock()
-    result.asr_text = asr_text
-    result.asr_matched = asr_matched
-    result.authenticated = authenticated
-    result.similarity_score = similarity_score
-    return result
+    return FakeVerificationResult(
+        asr_text=asr_text,
+        asr_matched=asr_matched,
+        authenticated=authenticated,
+        similarity_score=similarity_score,
+    )
+
+
+def start_verification(websocket: Any, message: str = START_VERIFY) -> dict[str, Any]:
+    """Send start_verify and return the prompt message."""
+    websocket.send_text(message)
+    return orjson.loads(websocket.receive_text())
+
+
+def fast_verify(
+    client: TestClient, speaker_id: str, audio: bytes
+) -> tuple[str, dict[str, Any]]:
+    """Verify over the fast_verify subprotocol in a single send/receive.
+
+    Returns:
+        The prompt from the handshake header and the verify_result message.
+    """
+    with client.websocket_connect(
+        f"/ws/verify?speaker_id={speaker_id}", subprotocols=["fast_verify"]
+    ) as websocket:
+        assert websocket.accepted_subprotocol == "fast_verify"
+        prompt = dict(websocket.extra_headers)[b"x-verify-prompt"].decode()
+        websocket.send_bytes(audio)
+        return prompt, orjson.loads(websocket.receive_text())
 
 
 class TestVerifyWebSocket:
     """Tests for /ws/verify endpoint."""
 
-    def test_successful_voice_verification(
-        self, client, mock_audio_processor, mock_speaker_store
+    @pytest.mark.anyio
+    async def test_successful_voice_verification(
+        self, app, mock_audio_processor, mock_speaker_store, patched_deps
     ):
         """Test complete successful voice verification flow."""
         # Setup successful verification result
@@ -85,52 +265,34 @@ class TestVerifyWebSocket:
             )
         )
 
-        with (
-            patch(
-                "voiceauth.app.websocket.verify.get_audio_processor",
-                return_value=mock_audio_processor,
-            ),
-            patch("voiceauth.app.websocket.verify.Session") as mock_session_class,
-            patch(
-                "voiceauth.app.websocket.verify.SpeakerStore",
-                return_value=mock_speaker_store,
-            ),
-        ):
-            mock_db_session = MagicMock()
-            mock_session_class.return_value.__enter__ = MagicMock(
-                return_value=mock_db_session
-            )
-            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
-
-            with client.websocket_connect("/ws/verify") as websocket:
-                # Step 1: Send start_verify
-                websocket.send_text(
-                    json.dumps(
-                        {
-                            "type": "start_verify",
-                            "speaker_id": "test-speaker-001",
-                        }
-                    )
-                )
-
-                # Step 2: Receive prompt
-                data = json.loads(websocket.receive_text())
-                assert data["type"] == "prompt"
-                assert "prompt" in data
-                assert len(data["prompt"]) == data["length"]
-
-                # Step 3: Send audio
-                websocket.send_bytes(b"fake-webm-audio-data")
-
-                # Step 4: Receive verification result
-                data = json.loads(websocket.receive_text())
-                assert data["type"] == "verify_result"
-                assert data["authenticated"] is True
-                assert data["auth_method"] == "voice"
-                assert data["asr_matched"] is True
-
-    def test_voice_failed_pin_fallback_success(
-        self, client, mock_audio_processor, mock_speaker_store
+        async with InProcessWebSocket(app, "/ws/verify") as websocket:
+            # Step 1: Send start_verify
+            await websocket.send_text(START_VERIFY)
+
+            # Step 2: Receive prompt
+            data = await websocket.receive_json()
+            assert data["type"] == "prompt"
+            assert "prompt" in data
+            assert len(data["prompt"]) == data["length"]
+
+            # Step 3: Send audio
+            await websocket.send_bytes(b"fake-webm-audio-data")
+
+            # Step 4: Receive verification result
+            data = await websocket.receive_json()
+            assert data["type"] == "verify_result"
+            assert data["authenticated"] is True
+            assert data["auth_method"] == "voice"
+            assert data["asr_matched"] is True
+
+        # 1:1 verification: one stored voiceprint is fetched and scored
+        mock_speaker_store.get_voiceprint.assert_called_once_with("test-speaker-001")
+        _, kwargs = mock_audio_processor.verify_audio.call_args
+        assert kwargs["registered_embedding"] is VOICEPRINT
+
+    @pytest.mark.anyio
+    async def test_voice_failed_pin_fallback_success(
+        self, app, mock_audio_processor, patched_deps
     ):
         """Test voice verification fails but PIN fallback succeeds."""
         # Setup failed voice verification
@@ -143,54 +305,95 @@ class TestVerifyWebSocket:
             )
         )
 
-        with (
-            patch(
-                "voiceauth.app.websocket.verify.get_audio_processor",
-                return_value=mock_audio_processor,
-            ),
-            patch("voiceauth.app.websocket.verify.Session") as mock_session_class,
-            patch(
-                "voiceauth.app.websocket.verify.SpeakerStore",
-                return_value=mock_speaker_store,
-            ),
-        ):
-            mock_db_session = MagicMock()
-            mock_session_class.return_value.__enter__ = MagicMock(
-                return_value=mock_db_session
+        async with InProcessWebSocket(app, "/ws/verify") as websocket:
+            # Start verification
+            await websocket.send_text(START_VERIFY)
+
+            # Receive prompt
+            data = await websocket.receive_json()
+            assert data["type"] == "prompt"
+
+            # Send audio
+            await websocket.send_bytes(b"fake-webm-audio-data")
+
+            # Receive failed voice verification with PIN fallback
+            data = await websocket.receive_json()
+            assert data["type"] == "verify_result"
+            assert data["authenticated"] is False
+            assert data["can_fallback_to_pin"] is True
+
+            # Send correct PIN
+            await websocket.send_text(VERIFY_PIN)
+
+            # Receive PIN verification success
+            data = await websocket.receive_json()
+            assert data["type"] == "verify_result"
+            assert data["authenticated"] is True
+            assert data["auth_method"] == "pin"
+
+    def test_msgpack_result_encoding(self, client, mock_audio_processor, patched_deps):
+        """Test server messages are MessagePack frames on the msgpack subprotocol."""
+        mock_audio_processor.verify_audio.return_value = (
+            create_mock_verification_result(
+                asr_text="1234",
+                asr_matched=True,
+                authenticated=True,
+                similarity_score=0.915,
             )
-            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
-
-            with client.websocket_connect("/ws/verify") as websocket:
-                # Start verification
-                websocket.send_text(
-                    json.dumps(
-                        {"type": "start_verify", "speaker_id": "test-speaker-001"}
-                    )
-                )
-
-                # Receive prompt
-                data = json.loads(websocket.receive_text())
-                assert data["type"] == "prompt"
-
-                # Send audio
-                websocket.send_bytes(b"fake-webm-audio-data")
-
-                # Receive failed voice verification with PIN fallback
-                data = json.loads(websocket.receive_text())
-                assert data["type"] == "verify_result"
-                assert data["authenticated"] is False
-                assert data["can_fallback_to_pin"] is True
-
-                # Send correct PIN
-                websocket.send_text(json.dumps({"type": "verify_pin", "pin": "1234"}))
-
-                # Receive PIN verification success
-                data = json.loads(websocket.receive_text())
-                assert data["type"] == "verify_result"
-                assert data["authenticated"] is True
-                assert data["auth_method"] == "pin"
-
-    def test_asr_mismatch(self, client, mock_audio_processor, mock_speaker_store):
+        )
+
+        with client.websocket_connect(
+            "/ws/verify", subprotocols=["msgpack"]
+        ) as websocket:
+            assert websocket.accepted_subprotocol == "msgpack"
+            websocket.send_text(START_VERIFY)
+
+            data = msgpack.unpackb(websocket.receive_bytes())
+            assert data["type"] == "prompt"
+            assert len(data["prompt"]) == data["length"]
+
+            websocket.send_bytes(b"fake-webm-audio-data")
+
+            data = msgpack.unpackb(websocket.receive_bytes())
+            assert data["type"] == "verify_result"
+            assert data["authenticated"] is True
+            assert data["voice_similarity"] == pytest.approx(0.915, abs=1e-6)
+
+    def test_fast_verify_prompt_in_handshake(
+        self, client, mock_audio_processor, patched_deps
+    ):
+        """Test fast_verify returns the prompt in the handshake and skips start."""
+        mock_audio_processor.verify_audio.return_value = (
+            create_mock_verification_result(
+                asr_text="1234",
+                asr_matched=True,
+                authenticated=True,
+                similarity_score=0.915,
+            )
+        )
+
+        prompt, data = fast_verify(client, "test-speaker-001", b"fake-webm-audio-data")
+
+        assert prompt.isdigit()
+        assert data["type"] == "verify_result"
+        assert data["authenticated"] is True
+        _, kwargs = mock_audio_processor.verify_audio.call_args
+        assert kwargs["expected_prompt"] == prompt
+
+    def test_fast_verify_unknown_speaker(
+        self, client, mock_speaker_store, patched_deps
+    ):
+        """Test fast_verify reports an unknown speaker after the handshake."""
+        mock_speaker_store.speaker_exists.return_value = False
+
+        with client.websocket_connect(
+            "/ws/verify?speaker_id=unknown-speaker", subprotocols=["fast_verify"]
+        ) as websocket:
+            assert websocket.extra_headers == []
+            data = orjson.loads(websocket.receive_text())
+            assert data["code"] == "SPEAKER_NOT_FOUND"
+
+    def test_asr_mismatch(self, client, mock_audio_processor, patched_deps):
         """Test verification fails when ASR doesn't match prompt."""
         # Setup ASR mismatch
         mock_audio_processor.verify_audio.return_value = (
@@ -201,82 +404,37 @@ class TestVerifyWebSocket:
             )
         )
 
-        with (
-            patch(
-                "voiceauth.app.websocket.verify.get_audio_processor",
-                return_value=mock_audio_processor,
-            ),
-            patch("voiceauth.app.websocket.verify.Session") as mock_session_class,
-            patch(
-                "voiceauth.app.websocket.verify.SpeakerStore",
-                return_value=mock_speaker_store,
-            ),
-        ):
-            mock_db_session = MagicMock()
-            mock_session_class.return_value.__enter__ = MagicMock(
-                return_value=mock_db_session
-            )
-            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
-
-            with client.websocket_connect("/ws/verify") as websocket:
-                websocket.send_text(
-                    json.dumps(
-                        {"type": "start_verify", "speaker_id": "test-speaker-001"}
-                    )
-                )
-
-                # Receive prompt
-                websocket.receive_text()
+        with client.websocket_connect("/ws/verify") as websocket:
+            start_verification(websocket)
 
-                # Send audio
-                websocket.send_bytes(b"fake-webm-audio-data")
+            # Send audio
+            websocket.send_bytes(b"fake-webm-audio-data")
 
-                # Receive verification result
-                data = json.loads(websocket.receive_text())
-                assert data["type"] == "verify_result"
-                assert data["authenticated"] is False
-                assert data["asr_matched"] is False
+            # Receive verification result
+            data = orjson.loads(websocket.receive_text())
+            assert data["type"] == "verify_result"
+            assert data["authenticated"] is False
+            assert data["asr_matched"] is False
 
-    def test_speaker_not_found(self, client, mock_audio_processor, mock_speaker_store):
+    def test_speaker_not_found(self, client, mock_speaker_store, patched_deps):
         """Test error when speaker doesn't exist."""
         mock_speaker_store.speaker_exists.return_value = False
 
-        with (
-            patch(
-                "voiceauth.app.websocket.verify.get_audio_processor",
-                return_value=mock_audio_processor,
-            ),
-            patch("voiceauth.app.websocket.verify.Session") as mock_session_class,
-            patch(
-                "voiceauth.app.websocket.verify.SpeakerStore",
-                return_value=mock_speaker_store,
-            ),
-        ):
-            mock_db_session = MagicMock()
-            mock_session_class.return_value.__enter__ = MagicMock(
-                return_value=mock_db_session
-            )
-            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
-
-            with client.websocket_connect("/ws/verify") as websocket:
-                websocket.send_text(
-                    json.dumps(
-                        {"type": "start_verify", "speaker_id": "unknown-speaker"}
-                    )
-                )
+        with client.websocket_connect("/ws/verify") as websocket:
+            websocket.send_text(START_VERIFY_UNKNOWN)
 
-                data = json.loads(websocket.receive_text())
-                assert data["type"] == "error"
-                assert data["code"] == "SPEAKER_NOT_FOUND"
+            data = orjson.loads(websocket.receive_text())
+            assert data["type"] == "error"
+            assert data["code"] == "SPEAKER_NOT_FOUND"
 
     def test_invalid_first_message(self, client):
         """Test error when first message is not start_verify."""
         with client.websocket_connect("/ws/verify") as websocket:
             websocket.send_text(
-                json.dumps({"type": "some_other_type", "speaker_id": "test"})
+                dumps({"type": "some_other_type", "speaker_id": "test"})
             )
 
-            data = json.loads(websocket.receive_text())
+            data = orjson.loads(websocket.receive_text())
             assert data["type"] == "error"
             assert data["code"] == "INVALID_MESSAGE"
 
@@ -285,52 +443,41 @@ class TestVerifyWebSocket:
         with client.websocket_connect("/ws/verify") as websocket:
             websocket.send_text("not a json message")
 
-            data = json.loads(websocket.receive_text())
+            data = orjson.loads(websocket.receive_text())
             assert data["type"] == "error"
             assert data["code"] == "INVALID_MESSAGE"
 
-    def test_text_instead_of_audio(
-        self, client, mock_audio_processor, mock_speaker_store
-    ):
+    def test_text_instead_of_audio(self, client, mock_audio_processor, patched_deps):
         """Test error when text is sent instead of audio."""
-        with (
-            patch(
-                "voiceauth.app.websocket.verify.get_audio_processor",
-                return_value=mock_audio_processor,
-            ),
-            patch("voiceauth.app.websocket.verify.Session") as mock_session_class,
-            patch(
-                "voiceauth.app.websocket.verify.SpeakerStore",
-                return_value=mock_speaker_store,
-            ),
-        ):
-            mock_db_session = MagicMock()
-            mock_session_class.return_value.__enter__ = MagicMock(
-                return_value=mock_db_session
-            )
-            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
+        with client.websocket_connect("/ws/verify") as websocket:
+            start_verification(websocket)
 
-            with client.websocket_connect("/ws/verify") as websocket:
-                websocket.send_text(
-                    json.dumps(
-                        {"type": "start_verify", "speaker_id": "test-speaker-001"}
-                    )
-                )
+            # Send text instead of binary audio
+            websocket.send_text(dumps({"type": "unexpected"}))
 
-                # Receive prompt
-                websocket.receive_text()
+            data = orjson.loads(websocket.receive_text())
+            assert data["type"] == "error"
+            assert data["code"] == "INVALID_MESSAGE"
+            assert "バイナリ" in data["message"] or "音声" in data["message"]
+        mock_audio_processor.process_webm.assert_not_called()
+
+    def test_audio_too_large(
+        self, client, mock_audio_processor, monkeypatch, patched_deps
+    ):
+        """Test oversized audio is rejected before it is processed."""
+        monkeypatch.setattr(verify_module.settings, "max_audio_bytes", 8)
 
-                # Send text instead of binary audio
-                websocket.send_text(json.dumps({"type": "unexpected"}))
+        with client.websocket_connect("/ws/verify") as websocket:
+            start_verification(websocket)
 
-                data = json.loads(websocket.receive_text())
-                assert data["type"] == "error"
-                assert data["code"] == "INVALID_MESSAGE"
-                assert "バイナリ" in data["message"] or "音声" in data["message"]
+            websocket.send_bytes(b"fake-webm-audio-data")
 
-    def test_pin_verification_failed(
-        self, client, mock_audio_processor, mock_speaker_store
-    ):
+            data = orjson.loads(websocket.receive_text())
+            assert data["type"] == "error"
+            assert data["code"] == "AUDIO_TOO_LARGE"
+        mock_audio_processor.process_webm.assert_not_called()
+
+    def test_pin_verification_failed(self, client, mock_audio_processor, patched_deps):
         """Test PIN verification fails with wrong PIN."""
         # Setup failed voice verification
         mock_audio_processor.verify_audio.return_value = (
@@ -342,59 +489,64 @@ class TestVerifyWebSocket:
             )
         )
 
-        with (
-            patch(
-                "voiceauth.app.websocket.verify.get_audio_processor",
-                return_value=mock_audio_processor,
-            ),
-            patch("voiceauth.app.websocket.verify.Session") as mock_session_class,
-            patch(
-                "voiceauth.app.websocket.verify.SpeakerStore",
-                return_value=mock_speaker_store,
-            ),
-        ):
-            mock_db_session = MagicMock()
-            mock_session_class.return_value.__enter__ = MagicMock(
-                return_value=mock_db_session
-            )
-            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
+        with client.websocket_connect("/ws/verify") as websocket:
+            start_verification(websocket)
 
-            with client.websocket_connect("/ws/verify") as websocket:
-                websocket.send_text(
-                    json.dumps(
-                        {"type": "start_verify", "speaker_id": "test-speaker-001"}
-                    )
-                )
+            # Send audio
+            websocket.send_bytes(b"fake-webm-audio-data")
 
-                # Receive prompt
-                websocket.receive_text()
+            # Receive failed voice verification
+            data = orjson.loads(websocket.receive_text())
+            assert data["can_fallback_to_pin"] is True
 
-                # Send audio
-                websocket.send_bytes(b"fake-webm-audio-data")
+            # Send wrong PIN
+            websocket.send_text(VERIFY_WRONG_PIN)
+
+            # Receive PIN verification failure
+            data = orjson.loads(websocket.receive_text())
+            assert data["type"] == "verify_result"
+            assert data["authenticated"] is False
+            # Can still retry
+            assert data["can_fallback_to_pin"] is True
+
+    def test_pin_removed_after_session_start(
+        self, client, mock_audio_processor, mock_speaker_store, patched_deps
+    ):
+        """Test the PIN is checked against the stored hash, not a cached one."""
+        mock_audio_processor.verify_audio.return_value = (
+            create_mock_verification_result(
+                asr_text="1234",
+                asr_matched=True,
+                authenticated=False,
+                similarity_score=0.615,
+            )
+        )
 
-                # Receive failed voice verification
-                data = json.loads(websocket.receive_text())
-                assert data["can_fallback_to_pin"] is True
+        with client.websocket_connect("/ws/verify") as websocket:
+            start_verification(websocket)
+            websocket.send_bytes(b"fake-webm-audio-data")
+            data = orjson.loads(websocket.receive_text())
+            assert data["can_fallback_to_pin"] is True
 
-                # Send wrong PIN
-                websocket.send_text(json.dumps({"type": "verify_pin", "pin": "9999"}))
+            # PIN removed elsewhere while the session was open
+            mock_speaker_store.get_pin_hash.return_value = None
+            websocket.send_text(VERIFY_PIN)
 
-                # Receive PIN verification failure
-                data = json.loads(websocket.receive_text())
-                assert data["type"] == "verify_result"
-                assert data["authenticated"] is False
-                # Can still retry
-                assert data["can_fallback_to_pin"] is True
+            data = orjson.loads(websocket.receive_text())
+            assert data["authenticated"] is False
+            assert data["message"] == "PINが登録されていません"
+        mock_speaker_store.get_pin_hash.assert_called_once_with("test-speaker-001")
 
     def test_speaker_without_pin_no_fallback(
-        self, client, mock_audio_processor, mock_speaker_store
+        self, client, mock_audio_processor, mock_speaker_store, patched_deps
     ):
         """Test no PIN fallback when speaker has no PIN."""
         # Speaker without PIN
-        mock_speaker = MagicMock(spec=Speaker)
-        mock_speaker.speaker_id = "test-speaker-002"
-        mock_speaker.pin_hash = None
-        mock_speaker_store.get_speaker_by_id.return_value = mock_speaker
+        mock_speaker_store.get_speaker_by_id.return_value = FakeSpeaker(
+            speaker_id="test-speaker-002",
+            speaker_name=None,
+            pin_hash=None,
+        )
 
         # Setup failed voice verification
         mock_audio_processor.verify_audio.return_value = (
@@ -406,41 +558,86 @@ class TestVerifyWebSocket:
             )
         )
 
-        with (
-            patch(
-                "voiceauth.app.websocket.verify.get_audio_processor",
-                return_value=mock_audio_processor,
-            ),
-            patch("voiceauth.app.websocket.verify.Session") as mock_session_class,
-            patch(
-                "voiceauth.app.websocket.verify.SpeakerStore",
-                return_value=mock_speaker_store,
-            ),
-        ):
-            mock_db_session = MagicMock()
-            mock_session_class.return_value.__enter__ = MagicMock(
-                return_value=mock_db_session
+        with client.websocket_connect("/ws/verify") as websocket:
+            start_verification(websocket, START_VERIFY_NO_PIN)
+
+            # Send audio
+            websocket.send_bytes(b"fake-webm-audio-data")
+
+            # Receive failed voice verification without PIN fallback
+            data = orjson.loads(websocket.receive_text())
+            assert data["type"] == "verify_result"
+            assert data["authenticated"] is False
+            assert (
+                "can_fallback_to_pin" not in data
+                or data.get("can_fallback_to_pin") is False
             )
-            mock_session_class.return_value.__exit__ = MagicMock(return_value=False)
-
-            with client.websocket_connect("/ws/verify") as websocket:
-                websocket.send_text(
-                    json.dumps(
-                        {"type": "start_verify", "speaker_id": "test-speaker-002"}
-                    )
-                )
-
-                # Receive prompt
-                websocket.receive_text()
-
-                # Send audio
-                websocket.send_bytes(b"fake-webm-audio-data")
-
-                # Receive failed voice verification without PIN fallback
-                data = json.loads(websocket.receive_text())
-                assert data["type"] == "verify_result"
-                assert data["authenticated"] is False
-                assert (
-                    "can_fallback_to_pin" not in data
-                    or data.get("can_fallback_to_pin") is False
-                )
+
+    def test_int8_voiceprint_scoring(self, mock_engines, real_audio_processor):
+        """Test the real scoring path with int8-quantized embeddings."""
+        mock_engines["voiceprint"].extract.return_value = VOICEPRINT_INT8
+
+        # int8 x int8 must not overflow; quantization barely moves the score
+        result = real_audio_processor.verify_audio(
+            SILENT_AUDIO, "1234", VOICEPRINT_INT8
+        )
+        assert result.similarity_score == pytest.approx(1.0, abs=1e-6)
+        assert result.authenticated is True
+
+        mock_engines["voiceprint"].extract.return_value = VOICEPRINT
+        result = real_audio_processor.verify_audio(
+            SILENT_AUDIO, "1234", VOICEPRINT_INT8
+        )
+        assert result.similarity_score == pytest.approx(1.0, abs=1e-3)
+
+    def test_scoring_uses_cosine_similarity(self, real_audio_processor):
+        """Test verify_audio scores with the shared cosine_similarity kernel."""
+        with patch.object(
+            verify_module, "cosine_similarity", return_value=0.0
+        ) as kernel:
+            result = real_audio_processor.verify_audio(SILENT_AUDIO, "1234", VOICEPRINT)
+
+        kernel.assert_called_once_with(VOICEPRINT, VOICEPRINT)
+        assert result.similarity_score == 0.0
+        assert result.authenticated is False
+
+    def test_get_audio_processor_is_shared(self, mock_engines, monkeypatch):
+        """Test the audio processor is built once and reused."""
+        monkeypatch.setattr(verify_module, "_audio_processor", None)
+        for name, engine in mock_engines.items():
+            monkeypatch.setattr(verify_module, f"get_{name}", lambda e=engine: e)
+
+        first = verify_module.get_audio_processor()
+        assert verify_module.get_audio_processor() is first
+
+    def test_asr_mismatch_skips_scoring(self, mock_engines, real_audio_processor):
+        """Test no embedding is extracted when the spoken digits are wrong."""
+        result = real_audio_processor.verify_audio(SILENT_AUDIO, "5678", VOICEPRINT)
+
+        assert result.asr_matched is False
+        assert result.authenticated is False
+        mock_engines["voiceprint"].extract.assert_not_called()
+
+    def test_short_speech_skips_models(self, mock_engines, real_audio_processor):
+        """Test a take with too little speech is rejected before ASR."""
+        mock_engines["vad"].extract_speech.return_value = SILENT_AUDIO[:160]
+
+        result = real_audio_processor.verify_audio(SILENT_AUDIO, "1234", VOICEPRINT)
+
+        assert result.asr_matched is False
+        assert result.authenticated is False
+        mock_engines["asr"].recognize.assert_not_called()
+        mock_engines["voiceprint"].extract.assert_not_called()
+
+    def test_silent_take_can_be_retried(self, mock_engines, real_audio_processor):
+        """Test VAD finding no speech at all is a retryable mismatch."""
+        mock_engines["vad"].extract_speech.side_effect = NoSpeechDetectedError(
+            "No speech detected in audio"
+        )
+
+        result = real_audio_processor.verify_audio(SILENT_AUDIO, "1234", VOICEPRINT)
+
+        assert result.asr_matched is False
+        assert result.authenticated is False
+        mock_engines["asr"].recognize.assert_not_called()
+        mock_engines["voiceprint"].extract.assert_not_called()
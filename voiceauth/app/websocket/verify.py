@@ -1,26 +1,42 @@
 """WebSocket endpoint for speaker verification."""
 
 import asyncio
-import json
+import threading
+from dataclasses import dataclass
 from typing import Any
 
+import msgpack
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel, ValidationError
 from sqlmodel import Session
 
+from voiceauth.app.model_loader import get_asr, get_vad, get_voiceprint
+from voiceauth.audio import AudioConverter
 from voiceauth.database import SpeakerStore
 from voiceauth.database.session import engine
 from voiceauth.domain_service import (
     SpeakerNotFoundError,
+    VerifyResult,
     VerifyService,
     VerifySession,
     VerifyState,
 )
+from voiceauth.domain_service.settings import settings as domain_settings
+from voiceauth.engine.exceptions import NoSpeechDetectedError
+from voiceauth.engine.settings import settings as engine_settings
+from voiceauth.engine.voiceprint import cosine_similarity
 
 from ..settings import settings
 
 router = APIRouter()
 
+# WebSocket subprotocol for binary MessagePack frames instead of JSON text
+MSGPACK_SUBPROTOCOL = "msgpack"
+# WebSocket subprotocol that delivers the prompt in the handshake response
+FAST_VERIFY_SUBPROTOCOL = "fast_verify"
+PROMPT_HEADER = b"x-verify-prompt"
+
 
 class StartVerifyMessage(BaseModel):
     """Message to start verification."""
@@ -36,162 +52,192 @@ class VerifyPINMessage(BaseModel):
     pin: str
 
 
-def create_error_response(code: str, message: str) -> dict[str, Any]:
-    """Create error response message."""
-    return {"type": "error", "code": code, "message": message}
-
-
-def create_prompt_response(prompt: str) -> dict[str, Any]:
-    """Create prompt response message."""
-    return {
-        "type": "prompt",
-        "prompt": prompt,
-        "length": len(prompt),
-    }
-
-
-def create_verify_result_response(
-    authenticated: bool,
-    speaker_id: str,
-    asr_result: str,
-    asr_matched: bool,
-    voice_similarity: float | None,
-    can_fallback_to_pin: bool,
-    auth_method: str | None,
-    message: str,
-) -> dict[str, Any]:
+# Responses that never vary (shared; never mutated)
+TIMEOUT_ERROR = {"type": "error", "code": "TIMEOUT", "message": "タイムアウトしました"}
+NOT_START_VERIFY_ERROR = {
+    "type": "error",
+    "code": "INVALID_MESSAGE",
+    "message": "最初のメッセージはstart_verifyである必要があります",
+}
+MISSING_SPEAKER_ID_ERROR = {
+    "type": "error",
+    "code": "INVALID_MESSAGE",
+    "message": "fast_verifyにはspeaker_idクエリパラメータが必要です",
+}
+AUDIO_EXPECTED_ERROR = {
+    "type": "error",
+    "code": "INVALID_MESSAGE",
+    "message": "音声データ（バイナリ）が期待されています",
+}
+AUDIO_TOO_LARGE_ERROR = {
+    "type": "error",
+    "code": "AUDIO_TOO_LARGE",
+    "message": "音声データが大きすぎます",
+}
+NOT_VERIFY_PIN_ERROR = {
+    "type": "error",
+    "code": "INVALID_MESSAGE",
+    "message": "verify_pinメッセージが期待されています",
+}
+
+
+def verify_result_response(result: VerifyResult) -> dict[str, Any]:
     """Create verification result response message."""
     response: dict[str, Any] = {
         "type": "verify_result",
-        "authenticated": authenticated,
-        "speaker_id": speaker_id,
-        "asr_result": asr_result,
-        "asr_matched": asr_matched,
-        "voice_similarity": voice_similarity,
-        "message": message,
+        "authenticated": result.authenticated,
+        "speaker_id": result.speaker_id,
+        "asr_result": result.asr_result,
+        "asr_matched": result.asr_matched,
+        "voice_similarity": result.voice_similarity,
+        "message": result.message,
     }
 
-    if can_fallback_to_pin and not authenticated:
+    if result.can_fallback_to_pin and not result.authenticated:
         response["can_fallback_to_pin"] = True
 
-    if auth_method:
-        response["auth_method"] = auth_method
+    if result.auth_method:
+        response["auth_method"] = result.auth_method
 
     return response
 
 
+def select_subprotocol(websocket: WebSocket) -> str | None:
+    """Select the subprotocol to accept from those the client requested.
+
+    Args:
+        websocket: Connection whose handshake is being answered.
+
+    Returns:
+        FAST_VERIFY_SUBPROTOCOL or MSGPACK_SUBPROTOCOL (in that order of
+        preference), or None when the client requested neither.
+    """
+    requested = websocket.scope.get("subprotocols", ())
+    for subprotocol in (FAST_VERIFY_SUBPROTOCOL, MSGPACK_SUBPROTOCOL):
+        if subprotocol in requested:
+            return subprotocol
+    return None
+
+
 async def send_json(websocket: WebSocket, data: dict[str, Any]) -> None:
-    """Send JSON message through WebSocket."""
-    await websocket.send_text(json.dumps(data, ensure_ascii=False))
+    """Send a message through WebSocket.
 
+    Encoded as MessagePack in a binary frame when the client negotiated the
+    "msgpack" subprotocol, otherwise as JSON text. orjson writes non-ASCII
+    (Japanese) text as raw UTF-8, like json.dumps(..., ensure_ascii=False),
+    but encodes in C.
+    """
+    if select_subprotocol(websocket) == MSGPACK_SUBPROTOCOL:
+        await websocket.send_bytes(msgpack.packb(data, use_single_float=True))
+    else:
+        await websocket.send_text(orjson.dumps(data).decode())
 
-def get_audio_processor() -> Any:
-    """Get audio processor instance.
 
-    Note: This is a placeholder. The actual implementation
-    would use proper dependency injection.
+async def receive_audio_frame(websocket: WebSocket) -> bytes | None:
+    """Receive the next frame where binary audio is expected.
+
+    Returns:
+        The audio bytes, or None if the client sent a text frame instead.
+
+    Raises:
+        WebSocketDisconnect: If the client disconnected.
     """
-    from voiceauth.app.model_loader import get_asr, get_vad, get_voiceprint
-    from voiceauth.audio import AudioConverter
-    from voiceauth.domain_service.settings import settings as domain_settings
-    from voiceauth.engine.voiceprint import cosine_similarity
-
-    class AudioProcessorWrapper:
-        def __init__(self) -> None:
-            self.converter = AudioConverter()
-            self.vad = get_vad()
-            self.asr = get_asr()
-            self.voiceprint = get_voiceprint()
-            self.similarity_threshold = domain_settings.similarity_threshold
-
-        def process_webm(self, webm_data: bytes) -> tuple[Any, int]:
-            return self.converter.webm_to_pcm(webm_data)
-
-        def verify_audio(
-            self,
-            audio: Any,
-            expected_prompt: str,
-            registered_embedding: Any,
-        ) -> Any:
-            # Run ASR
-            asr_result = self.asr.recognize(audio)
-
-            # Check if recognized digits match expected
-            asr_matched = asr_result.normalized_text == expected_prompt
-
-            if not asr_matched:
-
-                class VerificationResult:
-                    def __init__(self) -> None:
-                        self._asr_text = asr_result.normalized_text
-                        self._asr_matched = False
-                        self._similarity_score = 0.0
-                        self._authenticated = False
-
-                    @property
-                    def asr_text(self) -> str:
-                        return self._asr_text
-
-                    @property
-                    def asr_matched(self) -> bool:
-                        return self._asr_matched
-
-                    @property
-                    def similarity_score(self) -> float:
-                        return self._similarity_score
-
-                    @property
-                    def authenticated(self) -> bool:
-                        return self._authenticated
-
-                return VerificationResult()
-
-            # Extract speech-only audio via VAD, then compute embedding
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    return message.get("bytes")
+
+
+@dataclass(slots=True, frozen=True)
+class VerificationResult:
+    """Result of verifying one utterance against a registered voiceprint."""
+
+    asr_text: str
+    asr_matched: bool
+    similarity_score: float
+    authenticated: bool
+
+
+class AudioProcessorWrapper:
+    """Audio processor combining the converter and the shared models."""
+
+    def __init__(self) -> None:
+        self.converter = AudioConverter()
+        self.vad = get_vad()
+        self.asr = get_asr()
+        self.voiceprint = get_voiceprint()
+        self.similarity_threshold = domain_settings.similarity_threshold
+
+    def process_webm(self, webm_data: bytes) -> tuple[Any, int]:
+        return self.converter.webm_to_pcm(webm_data)
+
+    def verify_audio(
+        self,
+        audio: Any,
+        expected_prompt: str,
+        registered_embedding: Any,
+    ) -> VerificationResult:
+        # Extract speech-only audio via VAD first, so silent takes are
+        # rejected without running ASR or the embedding model. Like a digit
+        # mismatch, they leave the session open for another attempt.
+        try:
             speech_audio = self.vad.extract_speech(audio)
-            embedding = self.voiceprint.extract(speech_audio)
-
-            # Compare with registered embedding
-            score = float(cosine_similarity(embedding, registered_embedding))
-
-            authenticated = score >= self.similarity_threshold
-
-            class VerificationResult:
-                def __init__(
-                    self,
-                    text: str,
-                    matched: bool,
-                    sim_score: float,
-                    auth: bool,
-                ) -> None:
-                    self._asr_text = text
-                    self._asr_matched = matched
-                    self._similarity_score = sim_score
-                    self._authenticated = auth
-
-                @property
-                def asr_text(self) -> str:
-                    return self._asr_text
-
-                @property
-                def asr_matched(self) -> bool:
-                    return self._asr_matched
-
-                @property
-                def similarity_score(self) -> float:
-                    return self._similarity_score
-
-                @property
-                def authenticated(self) -> bool:
-                    return self._authenticated
+        except NoSpeechDetectedError:
+            speech_audio = audio[:0]
+        min_samples = int(
+            engine_settings.vad_min_speech_duration * engine_settings.target_sample_rate
+        )
+        if len(speech_audio) < min_samples:
+            return VerificationResult(
+                asr_text="",
+                asr_matched=False,
+                similarity_score=0.0,
+                authenticated=False,
+            )
 
+        # Run ASR on the (shorter) speech-only audio
+        asr_result = self.asr.recognize(speech_audio)
+
+        # Check if recognized digits match expected
+        if asr_result.normalized_text != expected_prompt:
             return VerificationResult(
-                asr_result.normalized_text,
-                asr_matched,
-                score,
-                authenticated,
+                asr_text=asr_result.normalized_text,
+                asr_matched=False,
+                similarity_score=0.0,
+                authenticated=False,
             )
 
-    return AudioProcessorWrapper()
+        # Compute embedding from the same speech audio
+        embedding = self.voiceprint.extract(speech_audio)
+
+        # Compare with registered embedding
+        score = float(cosine_similarity(embedding, registered_embedding))
+
+        return VerificationResult(
+            asr_text=asr_result.normalized_text,
+            asr_matched=True,
+            similarity_score=score,
+            authenticated=score >= self.similarity_threshold,
+        )
+
+
+# Shared audio processor instance (built lazily on first connection)
+_audio_processor: AudioProcessorWrapper | None = None
+_audio_processor_lock = threading.Lock()
+
+
+def get_audio_processor() -> AudioProcessorWrapper:
+    """Get the shared audio processor instance.
+
+    Note: This is a placeholder. The actual implementation
+    would use proper dependency injection.
+    """
+    global _audio_processor
+    if _audio_processor is None:
+        with _audio_processor_lock:
+            if _audio_processor is None:
+                _audio_processor = AudioProcessorWrapper()
+    return _audio_processor
 
 
 @router.websocket("/ws/verify")
@@ -208,46 +254,61 @@ async def verify_websocket(websocket: WebSocket) -> None:
        6.1 Client sends JSON: {"type": "verify_pin", "pin": "1234"}
        6.2 Server sends JSON: {"type": "verify_result", ...}
     7. Connection closes
+
+    Clients that request the "msgpack" subprotocol receive every server
+    message as a MessagePack-encoded binary frame instead of JSON text;
+    client messages are unchanged.
+
+    Clients that request the "fast_verify" subprotocol connect with
+    ?speaker_id=... and skip steps 2-3: the prompt is returned in the
+    X-Verify-Prompt handshake response header, so the client can record
+    and send audio (step 4) right after connecting. Browsers cannot read
+    handshake headers, so this is for native clients only.
     """
-    await websocket.accept()
+    subprotocol = select_subprotocol(websocket)
+    fast_verify = subprotocol == FAST_VERIFY_SUBPROTOCOL
+    if not fast_verify:
+        await websocket.accept(subprotocol=subprotocol)
 
     session: VerifySession | None = None
     verify_service: VerifyService | None = None
 
     try:
-        # Wait for start_verify message with timeout
-        try:
-            message = await asyncio.wait_for(
-                websocket.receive_text(),
-                timeout=settings.websocket_timeout,
-            )
-        except TimeoutError:
-            await send_json(
-                websocket,
-                create_error_response("TIMEOUT", "タイムアウトしました"),
-            )
-            return
-
-        # Parse start message
-        try:
-            data = json.loads(message)
-            if data.get("type") != "start_verify":
+        if fast_verify:
+            speaker_id = websocket.query_params.get("speaker_id")
+            if not speaker_id:
+                await websocket.accept(subprotocol=subprotocol)
                 await send_json(
                     websocket,
-                    create_error_response(
-                        "INVALID_MESSAGE",
-                        "最初のメッセージはstart_verifyである必要があります",
-                    ),
+                    MISSING_SPEAKER_ID_ERROR,
                 )
                 return
+        else:
+            # Wait for start_verify message with timeout
+            try:
+                async with asyncio.timeout(settings.websocket_timeout):
+                    message = await websocket.receive_text()
+            except TimeoutError:
+                await send_json(websocket, TIMEOUT_ERROR)
+                return
 
-            start_msg = StartVerifyMessage(**data)
-        except (json.JSONDecodeError, ValidationError) as e:
-            await send_json(
-                websocket,
-                create_error_response("INVALID_MESSAGE", f"無効なメッセージ: {e}"),
-            )
-            return
+            # Parse start message
+            try:
+                start_msg = StartVerifyMessage.model_validate_json(message)
+                if start_msg.type != "start_verify":
+                    await send_json(websocket, NOT_START_VERIFY_ERROR)
+                    return
+            except ValidationError as e:
+                await send_json(
+                    websocket,
+                    {
+                        "type": "error",
+                        "code": "INVALID_MESSAGE",
+                        "message": f"無効なメッセージ: {e}",
+                    },
+                )
+                return
+            speaker_id = start_msg.speaker_id
 
         # Create verify service with database session
         with Session(engine) as db_session:
@@ -258,66 +319,63 @@ async def verify_websocket(websocket: WebSocket) -> None:
             # Start verification
             try:
                 session = verify_service.start_verification(
-                    speaker_id=start_msg.speaker_id,
+                    speaker_id=speaker_id,
                 )
             except SpeakerNotFoundError:
+                if fast_verify:
+                    await websocket.accept(subprotocol=subprotocol)
                 await send_json(
                     websocket,
-                    create_error_response(
-                        "SPEAKER_NOT_FOUND",
-                        f"Speaker '{start_msg.speaker_id}' は登録されていません",
-                    ),
+                    {
+                        "type": "error",
+                        "code": "SPEAKER_NOT_FOUND",
+                        "message": f"Speaker '{speaker_id}' は登録されていません",
+                    },
                 )
                 return
 
             # Send prompt
-            await send_json(
-                websocket,
-                create_prompt_response(session.prompt),
-            )
-
-            # Wait for audio data
-            try:
-                message = await asyncio.wait_for(
-                    websocket.receive(),
-                    timeout=settings.websocket_timeout,
+            if fast_verify:
+                await websocket.accept(
+                    subprotocol=subprotocol,
+                    headers=[(PROMPT_HEADER, session.prompt.encode())],
                 )
-            except TimeoutError:
+            else:
                 await send_json(
                     websocket,
-                    create_error_response("TIMEOUT", "タイムアウトしました"),
+                    {
+                        "type": "prompt",
+                        "prompt": session.prompt,
+                        "length": len(session.prompt),
+                    },
                 )
+
+            # Wait for audio data
+            audio_data: bytes | None
+            try:
+                async with asyncio.timeout(settings.websocket_timeout):
+                    audio_data = await receive_audio_frame(websocket)
+            except TimeoutError:
+                await send_json(websocket, TIMEOUT_ERROR)
                 return
 
-            # Handle binary (audio) message
-            if "bytes" not in message:
-                await send_json(
-                    websocket,
-                    create_error_response(
-                        "INVALID_MESSAGE",
-                        "音声データ（バイナリ）が期待されています",
-                    ),
-                )
+            if audio_data is None:
+                await send_json(websocket, AUDIO_EXPECTED_ERROR)
                 return
 
-            audio_data = message["bytes"]
+            if len(audio_data) > settings.max_audio_bytes:
+                await send_json(websocket, AUDIO_TOO_LARGE_ERROR)
+                return
 
-            # Verify voice
-            result = verify_service.verify_voice(session, audio_data)
+            # Verify voice off the event loop (decode + model inference)
+            result = await asyncio.to_thread(
+                verify_service.verify_voice, session, audio_data
+            )
 
             # Send verification result
             await send_json(
                 websocket,
-                create_verify_result_response(
-                    authenticated=result.authenticated,
-                    speaker_id=result.speaker_id,
-                    asr_result=result.asr_result,
-                    asr_matched=result.asr_matched,
-                    voice_similarity=result.voice_similarity,
-                    can_fallback_to_pin=result.can_fallback_to_pin,
-                    auth_method=result.auth_method,
-                    message=result.message,
-                ),
+                verify_result_response(result),
             )
 
             # If authenticated or no PIN fallback, we're done
@@ -327,55 +385,37 @@ async def verify_websocket(websocket: WebSocket) -> None:
             # Wait for PIN verification (optional)
             while session.state != VerifyState.AUTHENTICATED:
                 try:
-                    message = await asyncio.wait_for(
-                        websocket.receive_text(),
-                        timeout=settings.websocket_timeout,
-                    )
+                    async with asyncio.timeout(settings.websocket_timeout):
+                        message = await websocket.receive_text()
                 except TimeoutError:
-                    await send_json(
-                        websocket,
-                        create_error_response("TIMEOUT", "タイムアウトしました"),
-                    )
+                    await send_json(websocket, TIMEOUT_ERROR)
                     return
 
                 # Parse PIN message
                 try:
-                    data = json.loads(message)
-                    if data.get("type") != "verify_pin":
-                        await send_json(
-                            websocket,
-                            create_error_response(
-                                "INVALID_MESSAGE",
-                                "verify_pinメッセージが期待されています",
-                            ),
-                        )
+                    pin_msg = VerifyPINMessage.model_validate_json(message)
+                    if pin_msg.type != "verify_pin":
+                        await send_json(websocket, NOT_VERIFY_PIN_ERROR)
                         continue
-
-                    pin_msg = VerifyPINMessage(**data)
-                except (json.JSONDecodeError, ValidationError) as e:
+                except ValidationError as e:
                     await send_json(
                         websocket,
-                        create_error_response(
-                            "INVALID_MESSAGE", f"無効なメッセージ: {e}"
-                        ),
+                        {
+                            "type": "error",
+                            "code": "INVALID_MESSAGE",
+                            "message": f"無効なメッセージ: {e}",
+                        },
                     )
                     continue
 
                 # Verify PIN
-                result = verify_service.verify_pin(session, pin_msg.pin)
+                result = await asyncio.to_thread(
+                    verify_service.verify_pin, session, pin_msg.pin
+                )
 
                 await send_json(
                     websocket,
-                    create_verify_result_response(
-                        authenticated=result.authenticated,
-                        speaker_id=result.speaker_id,
-                        asr_result=result.asr_result,
-                        asr_matched=result.asr_matched,
-                        voice_similarity=result.voice_similarity,
-                        can_fallback_to_pin=result.can_fallback_to_pin,
-                        auth_method=result.auth_method,
-                        message=result.message,
-                    ),
+                    verify_result_response(result),
                 )
 
                 if result.authenticated:
@@ -388,7 +428,11 @@ async def verify_websocket(websocket: WebSocket) -> None:
         try:
             await send_json(
                 websocket,
-                create_error_response("INTERNAL_ERROR", f"内部エラー: {e}"),
+                {
+                    "type": "error",
+                    "code": "INTERNAL_ERROR",
+                    "message": f"内部エラー: {e}",
+                },
             )
         except Exception:
             pass
@@ -8,6 +8,19 @@ import numpy as np
 from voiceauth.engine.exceptions import AudioConversionError
 from voiceauth.engine.settings import settings
 
+# int16 -> [-1, 1] float32 scale (exact: power of two)
+INT16_SCALE = np.float32(1.0 / 32768.0)
+
+
+def _int16_chunks_to_float32(chunks: list[np.ndarray]) -> np.ndarray:
+    """Scale decoded int16 chunks into a single preallocated float32 array."""
+    out = np.empty(sum(len(chunk) for chunk in chunks), dtype=np.float32)
+    pos = 0
+    for chunk in chunks:
+        np.multiply(chunk, INT16_SCALE, out=out[pos : pos + len(chunk)])
+        pos += len(chunk)
+    return out
+
 
 class AudioConverter:
     """Audio converter using PyAV.
@@ -56,11 +69,8 @@ class AudioConverter:
             if not samples_list:
                 raise AudioConversionError("No audio samples decoded from webm data")
 
-            # Concatenate all samples
-            samples = np.concatenate(samples_list)
-
-            # Convert from int16 to float32 normalized to [-1, 1]
-            samples = samples.astype(np.float32) / 32768.0
+            # Convert int16 chunks to float32 normalized to [-1, 1]
+            samples = _int16_chunks_to_float32(samples_list)
 
             return samples, settings.target_sample_rate
 
@@ -109,8 +119,7 @@ class AudioConverter:
             if not samples_list:
                 raise AudioConversionError(f"No audio samples decoded from {file_path}")
 
-            samples = np.concatenate(samples_list)
-            samples = samples.astype(np.float32) / 32768.0
+            samples = _int16_chunks_to_float32(samples_list)
 
             return samples, settings.target_sample_rate
 
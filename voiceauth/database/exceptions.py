@@ -1,5 +1,7 @@
 """Database exceptions."""
 
+from voiceauth.domain.protocols.store import DuplicateSpeakerError
+
 
 class DatabaseError(Exception):
     """Base exception for database operations."""
@@ -13,7 +15,7 @@ class SpeakerNotFoundError(DatabaseError):
     pass
 
 
-class SpeakerAlreadyExistsError(DatabaseError):
+class SpeakerAlreadyExistsError(DatabaseError, DuplicateSpeakerError):
     """Raised when attempting to create a speaker that already exists."""
 
     pass
@@ -8,12 +8,19 @@ import ulid
 from sqlalchemy import UniqueConstraint
 from sqlmodel import Field, Relationship, SQLModel
 
+from voiceauth.database.settings import settings
+
 if TYPE_CHECKING:
     pass
 
 # Embedding dimension for CAM++ model
 EMBEDDING_DIM = 512
 
+# Header of int8-quantized embeddings (header, float32 scale, int8 values).
+# Read as float32 it is a NaN, which a stored float32 embedding never
+# contains, so the two formats cannot be confused.
+INT8_EMBEDDING_MAGIC = b"q8\xff\x7f"
+
 
 def _generate_ulid() -> str:
     """Generate a new ULID string."""
@@ -62,8 +69,9 @@ class VoiceprintModel(SQLModel, table=True):
         index=True,
         max_length=26,
     )
-    speaker_id: int = Field(foreign_key="speakers.id", index=True)
-    embedding: bytes = Field()  # 512-dim float32 = 2048 bytes
+    # Indexed by uq_speaker_voiceprint; a separate index would be redundant
+    speaker_id: int = Field(foreign_key="speakers.id")
+    embedding: bytes = Field()  # float32 (4 bytes/dim) or int8 (8 + 1 byte/dim)
     created_at: datetime = Field(default_factory=_utc_now)
 
     speaker: "SpeakerModel" = Relationship(back_populates="voiceprints")
@@ -72,22 +80,43 @@ class VoiceprintModel(SQLModel, table=True):
     def serialize_embedding(embedding: np.ndarray) -> bytes:
         """Convert numpy embedding array to bytes for storage.
 
+        The embedding is stored L2-normalized, so cosine similarity against
+        it only needs the query's norm. With settings.voiceprint_int8 it is
+        quantized to int8 with a per-vector scale (about 4x smaller).
+
         Args:
             embedding: numpy array of shape (512,) with float32 dtype
 
         Returns:
-            bytes representation of the embedding
+            bytes representation of the normalized embedding
         """
-        return embedding.astype(np.float32).tobytes()
+        normalized = np.array(embedding, dtype=np.float32)
+        norm = np.linalg.norm(normalized)
+        if norm > 0:
+            normalized /= norm
+
+        if not settings.voiceprint_int8:
+            return normalized.tobytes()
+
+        peak = float(np.abs(normalized).max(initial=0.0))
+        scale = np.float32(peak / 127.0 if peak > 0 else 1.0)
+        quantized = np.round(normalized / scale).astype(np.int8)
+        return INT8_EMBEDDING_MAGIC + scale.tobytes() + quantized.tobytes()
 
     @staticmethod
     def deserialize_embedding(data: bytes) -> np.ndarray:
         """Convert stored bytes back to numpy embedding array.
 
         Args:
-            data: bytes representation of the embedding
+            data: bytes representation of the embedding (float32 or int8)
 
         Returns:
-            numpy array of shape (512,) with float32 dtype
+            numpy array of shape (512,) with float32 dtype. float32 rows are
+            a read-only view of data; int8 rows are dequantized into a new
+            array.
         """
+        if data[:4] == INT8_EMBEDDING_MAGIC:
+            scale = np.frombuffer(data, dtype=np.float32, count=1, offset=4)[0]
+            quantized = np.frombuffer(data, dtype=np.int8, offset=8)
+            return np.multiply(quantized, scale, dtype=np.float32)
         return np.frombuffer(data, dtype=np.float32)
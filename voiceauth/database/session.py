@@ -1,17 +1,53 @@
 """Database session management."""
 
 from collections.abc import Generator
+from sqlite3 import Connection as SQLiteConnection
+from typing import Any
 
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
 from sqlmodel import Session, create_engine
 
 from voiceauth.database.settings import settings
 
-engine = create_engine(
-    settings.database_url,
-    echo=False,
-    connect_args={"check_same_thread": False},
+# Applied to every new SQLite connection. WAL lets readers (speaker and
+# voiceprint lookups) proceed while an enrollment writes; NORMAL sync is
+# durable across application crashes in WAL mode.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
 )
 
+if settings.sqlite_path == ":memory:":
+    # One shared connection, otherwise each connection gets its own database
+    engine = create_engine(
+        settings.database_url,
+        echo=False,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+else:
+    engine = create_engine(
+        settings.database_url,
+        echo=False,
+        connect_args={"check_same_thread": False},
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+    )
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection: SQLiteConnection, _: Any) -> None:
+    """Configure a new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
 
 def get_session() -> Generator[Session, None, None]:
     """Get a database session.
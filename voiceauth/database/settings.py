@@ -13,6 +13,17 @@ class DatabaseSettings(BaseSettings):
     )
 
     sqlite_path: str = "./sqlite_data/voiceauth.db"
+    # Connections kept open per process (WAL lets readers run concurrently)
+    pool_size: int = 16
+    max_overflow: int = 32
+    # Number of decoded voiceprints kept in memory per process (0 disables)
+    voiceprint_cache_size: int = 1024
+    # Seconds a speaker record is served from memory (0 disables); changes
+    # made through another worker process show up after at most this long
+    speaker_cache_ttl: float = 30.0
+    speaker_cache_size: int = 10_000
+    # Store new voiceprints as int8 + per-vector scale instead of float32
+    voiceprint_int8: bool = False
 
     @property
     def database_url(self) -> str:
@@ -1,5 +1,7 @@
 """Database stores."""
 
+from voiceauth.database.stores.speaker_cache import SpeakerCache
 from voiceauth.database.stores.speaker_store import SpeakerStore
+from voiceauth.database.stores.voiceprint_cache import VoiceprintCache
 
-__all__ = ["SpeakerStore"]
+__all__ = ["SpeakerCache", "SpeakerStore", "VoiceprintCache"]
@@ -0,0 +1,82 @@
+"""In-memory TTL cache of speaker records."""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+
+from voiceauth.database.settings import settings
+from voiceauth.domain.models import Speaker
+
+
+class SpeakerCache:
+    """Thread-safe TTL + LRU cache of speakers keyed by speaker_id.
+
+    Only existing speakers are cached (no negative entries), so a speaker
+    enrolled through another worker is visible immediately. Changes made
+    through another worker become visible once the entry expires.
+    """
+
+    def __init__(self, ttl: float | None = None, maxsize: int | None = None) -> None:
+        """Initialize speaker cache.
+
+        Args:
+            ttl: Seconds an entry stays valid.
+                Defaults to settings.speaker_cache_ttl; 0 disables caching.
+            maxsize: Maximum number of speakers to keep.
+                Defaults to settings.speaker_cache_size.
+        """
+        self._ttl = settings.speaker_cache_ttl if ttl is None else ttl
+        self._maxsize = settings.speaker_cache_size if maxsize is None else maxsize
+        self._entries: OrderedDict[str, tuple[float, Speaker]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, speaker_id: str) -> Speaker | None:
+        """Get a copy of a cached speaker.
+
+        Args:
+            speaker_id: The speaker's identifier
+
+        Returns:
+            The Speaker instance, or None on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(speaker_id)
+            if entry is None:
+                return None
+            expires_at, speaker = entry
+            if expires_at <= now:
+                del self._entries[speaker_id]
+                return None
+            self._entries.move_to_end(speaker_id)
+        return replace(speaker)
+
+    def put(self, speaker: Speaker) -> None:
+        """Cache a copy of a speaker.
+
+        Args:
+            speaker: Speaker as just read from or written to the database
+        """
+        if self._ttl <= 0 or self._maxsize <= 0:
+            return
+
+        expires_at = time.monotonic() + self._ttl
+        with self._lock:
+            self._entries[speaker.speaker_id] = (expires_at, replace(speaker))
+            self._entries.move_to_end(speaker.speaker_id)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, speaker_id: str) -> None:
+        """Remove a speaker from the cache.
+
+        Args:
+            speaker_id: The speaker's identifier
+        """
+        with self._lock:
+            self._entries.pop(speaker_id, None)
+
+
+# Shared by every SpeakerStore in the process
+speaker_cache = SpeakerCache()
@@ -4,6 +4,9 @@ from datetime import UTC, datetime
 
 import numpy as np
 import ulid
+from sqlalchemy import delete, exists
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
 from voiceauth.database.exceptions import (
@@ -12,6 +15,11 @@ from voiceauth.database.exceptions import (
     VoiceprintNotFoundError,
 )
 from voiceauth.database.models import SpeakerModel, VoiceprintModel
+from voiceauth.database.stores.speaker_cache import SpeakerCache, speaker_cache
+from voiceauth.database.stores.voiceprint_cache import (
+    VoiceprintCache,
+    voiceprint_cache,
+)
 from voiceauth.domain.models import Speaker, Voiceprint
 
 
@@ -21,13 +29,31 @@ class SpeakerStore:
     Implements SpeakerStoreProtocol from voiceauth.domain.protocols.store.
     """
 
-    def __init__(self, session: Session) -> None:
+    def __init__(
+        self,
+        session: Session,
+        embedding_cache: VoiceprintCache | None = None,
+        record_cache: SpeakerCache | None = None,
+    ) -> None:
         """Initialize store with a database session.
 
+        Every write commits, and the voiceprint upsert relies on SQLite's
+        ON CONFLICT and RETURNING, so the session should come from the
+        engine in voiceauth.database.session, which applies SQLITE_PRAGMAS
+        (WAL, synchronous=NORMAL) to each connection.
+
         Args:
             session: SQLModel database session
+            embedding_cache: Cache of decoded voiceprints.
+                Defaults to the process-wide voiceprint_cache.
+            record_cache: Cache of speaker records.
+                Defaults to the process-wide speaker_cache.
         """
         self.session = session
+        self.embedding_cache = (
+            voiceprint_cache if embedding_cache is None else embedding_cache
+        )
+        self.record_cache = speaker_cache if record_cache is None else record_cache
 
     def _to_domain_speaker(self, model: SpeakerModel) -> Speaker:
         """Convert database model to domain model."""
@@ -70,18 +96,71 @@ class SpeakerStore:
         Raises:
             SpeakerAlreadyExistsError: If speaker_id already exists
         """
-        if self.speaker_exists(speaker_id):
-            raise SpeakerAlreadyExistsError(f"Speaker '{speaker_id}' already exists")
+        model = SpeakerModel(
+            speaker_id=speaker_id,
+            speaker_name=speaker_name,
+            pin_hash=pin_hash,
+        )
+        self.session.add(model)
+        # Flush assigns the primary key; build the result before commit
+        # expires the instance so no refresh SELECT is needed. Duplicates
+        # are rejected by the unique constraint instead of a pre-check.
+        try:
+            self.session.flush()
+        except IntegrityError as e:
+            self.session.rollback()
+            raise SpeakerAlreadyExistsError(
+                f"Speaker '{speaker_id}' already exists"
+            ) from e
+        speaker = self._to_domain_speaker(model)
+        self.session.commit()
+        self.record_cache.put(speaker)
+        return speaker
+
+    def create_speaker_with_voiceprint(
+        self,
+        speaker_id: str,
+        embedding: np.ndarray,
+        speaker_name: str | None = None,
+        pin_hash: str | None = None,
+    ) -> Speaker:
+        """Create a new speaker together with its voiceprint.
+
+        Both rows are written in one transaction, so enrollment pays for a
+        single commit and never leaves a speaker without a voiceprint.
 
+        Args:
+            speaker_id: Unique identifier for the speaker
+            embedding: numpy array of shape (512,) with float32 dtype
+            speaker_name: Optional display name
+            pin_hash: Optional SHA-256 hash of PIN
+
+        Returns:
+            The created Speaker instance
+
+        Raises:
+            SpeakerAlreadyExistsError: If speaker_id already exists
+        """
         model = SpeakerModel(
             speaker_id=speaker_id,
             speaker_name=speaker_name,
             pin_hash=pin_hash,
         )
+        model.voiceprints.append(
+            VoiceprintModel(embedding=VoiceprintModel.serialize_embedding(embedding))
+        )
         self.session.add(model)
+        try:
+            self.session.flush()
+        except IntegrityError as e:
+            self.session.rollback()
+            raise SpeakerAlreadyExistsError(
+                f"Speaker '{speaker_id}' already exists"
+            ) from e
+        speaker = self._to_domain_speaker(model)
         self.session.commit()
-        self.session.refresh(model)
-        return self._to_domain_speaker(model)
+        self.record_cache.put(speaker)
+        return speaker
 
     def get_speaker_by_id(self, speaker_id: str) -> Speaker:
         """Get a speaker by their speaker_id.
@@ -95,11 +174,17 @@ class SpeakerStore:
         Raises:
             SpeakerNotFoundError: If speaker not found
         """
+        cached = self.record_cache.get(speaker_id)
+        if cached is not None:
+            return cached
+
         statement = select(SpeakerModel).where(SpeakerModel.speaker_id == speaker_id)
         model = self.session.exec(statement).first()
         if model is None:
             raise SpeakerNotFoundError(f"Speaker '{speaker_id}' not found")
-        return self._to_domain_speaker(model)
+        speaker = self._to_domain_speaker(model)
+        self.record_cache.put(speaker)
+        return speaker
 
     def get_speaker_by_public_id(self, public_id: str) -> Speaker:
         """Get a speaker by their public_id (ULID).
@@ -130,8 +215,28 @@ class SpeakerStore:
         Returns:
             True if speaker exists, False otherwise
         """
-        statement = select(SpeakerModel).where(SpeakerModel.speaker_id == speaker_id)
-        return self.session.exec(statement).first() is not None
+        if self.record_cache.get(speaker_id) is not None:
+            return True
+        statement = select(exists().where(SpeakerModel.speaker_id == speaker_id))
+        return bool(self.session.scalar(statement))
+
+    def get_pin_hash(self, speaker_id: str) -> str | None:
+        """Get a speaker's current PIN hash.
+
+        Always read from the database, not the record cache, so a PIN that
+        was changed or removed through another worker takes effect at once.
+
+        Args:
+            speaker_id: The speaker's identifier
+
+        Returns:
+            The SHA-256 hash of the PIN, or None if the speaker has no PIN
+            or no longer exists
+        """
+        statement = select(SpeakerModel.pin_hash).where(
+            SpeakerModel.speaker_id == speaker_id
+        )
+        return self.session.exec(statement).first()
 
     def update_speaker_pin(self, speaker_id: str, pin_hash: str | None) -> Speaker:
         """Update a speaker's PIN hash.
@@ -154,9 +259,11 @@ class SpeakerStore:
         model.pin_hash = pin_hash
         model.updated_at = datetime.now(UTC)
         self.session.add(model)
+        self.session.flush()
+        speaker = self._to_domain_speaker(model)
         self.session.commit()
-        self.session.refresh(model)
-        return self._to_domain_speaker(model)
+        self.record_cache.put(speaker)
+        return speaker
 
     def delete_speaker(self, speaker_id: str) -> None:
         """Delete a speaker and all associated voiceprints.
@@ -167,22 +274,25 @@ class SpeakerStore:
         Raises:
             SpeakerNotFoundError: If speaker not found
         """
-        statement = select(SpeakerModel).where(SpeakerModel.speaker_id == speaker_id)
-        model = self.session.exec(statement).first()
-        if model is None:
+        # Delete by key instead of loading the speaker, whose ORM cascade
+        # would also load the voiceprint rows with their embedding blobs
+        speaker_pk = (
+            select(SpeakerModel.id)
+            .where(SpeakerModel.speaker_id == speaker_id)
+            .scalar_subquery()
+        )
+        self.session.execute(
+            delete(VoiceprintModel).where(VoiceprintModel.speaker_id == speaker_pk)
+        )
+        result = self.session.execute(
+            delete(SpeakerModel).where(SpeakerModel.speaker_id == speaker_id)
+        )
+        self.record_cache.discard(speaker_id)
+        if result.rowcount == 0:
+            self.session.rollback()
             raise SpeakerNotFoundError(f"Speaker '{speaker_id}' not found")
-
-        self.session.delete(model)
         self.session.commit()
 
-    def _get_speaker_model(self, speaker_id: str) -> SpeakerModel:
-        """Get speaker model by speaker_id."""
-        statement = select(SpeakerModel).where(SpeakerModel.speaker_id == speaker_id)
-        model = self.session.exec(statement).first()
-        if model is None:
-            raise SpeakerNotFoundError(f"Speaker '{speaker_id}' not found")
-        return model
-
     def add_voiceprint(self, speaker_id: str, embedding: np.ndarray) -> Voiceprint:
         """Add or update a voiceprint for a speaker.
 
@@ -196,57 +306,87 @@ class SpeakerStore:
         Raises:
             SpeakerNotFoundError: If speaker not found
         """
-        speaker_model = self._get_speaker_model(speaker_id)
-
-        # Check for existing voiceprint
-        statement = select(VoiceprintModel).where(
-            VoiceprintModel.speaker_id == speaker_model.id,
+        # The primary key is resolved inside the statement rather than taken
+        # from the speaker cache: SQLite does not enforce the foreign key, so
+        # a cached id of a speaker deleted by another worker would leave an
+        # orphan row. An unknown speaker yields NULL and fails NOT NULL.
+        speaker_pk = (
+            select(SpeakerModel.id)
+            .where(SpeakerModel.speaker_id == speaker_id)
+            .scalar_subquery()
         )
-        existing = self.session.exec(statement).first()
-
-        if existing:
-            # Update existing voiceprint
-            existing.embedding = VoiceprintModel.serialize_embedding(embedding)
-            existing.public_id = str(ulid.new())
-            existing.created_at = datetime.now(UTC)
-            self.session.add(existing)
-            self.session.commit()
-            self.session.refresh(existing)
-            return self._to_domain_voiceprint(existing)
-
-        # Create new voiceprint
-        model = VoiceprintModel(
-            speaker_id=speaker_model.id,
+
+        # Insert or replace in one atomic statement; concurrent enrollments
+        # for the same speaker cannot both take the insert path
+        statement = sqlite_insert(VoiceprintModel).values(
+            speaker_id=speaker_pk,
             embedding=VoiceprintModel.serialize_embedding(embedding),
+            public_id=str(ulid.new()),
+            created_at=datetime.now(UTC),
         )
-        self.session.add(model)
+        statement = statement.on_conflict_do_update(
+            index_elements=["speaker_id"],
+            set_={
+                "embedding": statement.excluded.embedding,
+                "public_id": statement.excluded.public_id,
+                "created_at": statement.excluded.created_at,
+            },
+        ).returning(VoiceprintModel)
+        try:
+            model = self.session.scalars(
+                statement, execution_options={"populate_existing": True}
+            ).one()
+        except IntegrityError as e:
+            self.session.rollback()
+            self.record_cache.discard(speaker_id)
+            raise SpeakerNotFoundError(f"Speaker '{speaker_id}' not found") from e
+        voiceprint = self._to_domain_voiceprint(model)
         self.session.commit()
-        self.session.refresh(model)
-        return self._to_domain_voiceprint(model)
+        return voiceprint
 
     def get_voiceprint(self, speaker_id: str) -> np.ndarray:
         """Get the voiceprint embedding for a speaker.
 
+        The embedding is decoded and L2-normalized once, then served from
+        the embedding cache until the voiceprint is replaced.
+
         Args:
             speaker_id: The speaker's identifier
 
         Returns:
-            numpy array of shape (512,) with float32 dtype
+            Read-only L2-normalized numpy array with float32 dtype
 
         Raises:
             SpeakerNotFoundError: If speaker not found
             VoiceprintNotFoundError: If voiceprint not found
         """
-        speaker_model = self._get_speaker_model(speaker_id)
-        statement = select(VoiceprintModel).where(
-            VoiceprintModel.speaker_id == speaker_model.id,
+        # One round trip resolves the speaker and its voiceprint's public_id
+        statement = (
+            select(SpeakerModel.id, VoiceprintModel.public_id)
+            .outerjoin(VoiceprintModel, VoiceprintModel.speaker_id == SpeakerModel.id)
+            .where(SpeakerModel.speaker_id == speaker_id)
         )
-        model = self.session.exec(statement).first()
-        if model is None:
+        row = self.session.exec(statement).first()
+        if row is None:
+            raise SpeakerNotFoundError(f"Speaker '{speaker_id}' not found")
+        public_id = row[1]
+        if public_id is None:
             raise VoiceprintNotFoundError(
                 f"Voiceprint not found for speaker '{speaker_id}'"
             )
-        return VoiceprintModel.deserialize_embedding(model.embedding)
+
+        cached = self.embedding_cache.get(public_id)
+        if cached is not None:
+            return cached
+
+        # Cache miss: load the blob only now
+        statement = select(VoiceprintModel.embedding).where(
+            VoiceprintModel.public_id == public_id,
+        )
+        data = self.session.exec(statement).one()
+        return self.embedding_cache.put(
+            public_id, VoiceprintModel.deserialize_embedding(data)
+        )
 
     def has_voiceprint(self, speaker_id: str) -> bool:
         """Check if a speaker has a voiceprint.
@@ -260,8 +400,14 @@ class SpeakerStore:
         Raises:
             SpeakerNotFoundError: If speaker not found
         """
-        speaker_model = self._get_speaker_model(speaker_id)
-        statement = select(VoiceprintModel).where(
-            VoiceprintModel.speaker_id == speaker_model.id,
+        # One round trip resolves the speaker and tests for its voiceprint
+        # without loading the embedding blob
+        statement = (
+            select(SpeakerModel.id, VoiceprintModel.id)
+            .outerjoin(VoiceprintModel, VoiceprintModel.speaker_id == SpeakerModel.id)
+            .where(SpeakerModel.speaker_id == speaker_id)
         )
-        return self.session.exec(statement).first() is not None
+        row = self.session.exec(statement).first()
+        if row is None:
+            raise SpeakerNotFoundError(f"Speaker '{speaker_id}' not found")
+        return row[1] is not None
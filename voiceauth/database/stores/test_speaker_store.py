@@ -0,0 +1,202 @@
+"""Tests for SpeakerStore against an in-memory SQLite database."""
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, func, select
+
+from voiceauth.database.exceptions import (
+    SpeakerAlreadyExistsError,
+    SpeakerNotFoundError,
+)
+from voiceauth.database.models import SpeakerModel, VoiceprintModel
+from voiceauth.database.stores import SpeakerCache, SpeakerStore, VoiceprintCache
+from voiceauth.domain.protocols import DuplicateSpeakerError
+
+# Shared read-only test data, generated once per module
+_RNG = np.random.default_rng(0)
+EMBEDDING = _RNG.standard_normal(192, dtype=np.float32)
+OTHER_EMBEDDING = _RNG.standard_normal(192, dtype=np.float32)
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def engine():
+    """Create an empty in-memory database."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    """Create a database session."""
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def store(session):
+    """Create a store with private caches."""
+    return SpeakerStore(session, VoiceprintCache(16), SpeakerCache(60.0, 16))
+
+
+def _voiceprint_count(session: Session) -> int:
+    return session.exec(select(func.count()).select_from(VoiceprintModel)).one()
+
+
+class TestAddVoiceprint:
+    """Tests for the add_voiceprint upsert."""
+
+    def test_insert(self, store, session):
+        """Test the first voiceprint is inserted for the speaker."""
+        speaker = store.create_speaker("alice")
+
+        voiceprint = store.add_voiceprint("alice", EMBEDDING)
+
+        assert voiceprint.id is not None
+        assert voiceprint.speaker_id == speaker.id
+        assert _voiceprint_count(session) == 1
+        np.testing.assert_allclose(
+            store.get_voiceprint("alice"), _unit(EMBEDDING), atol=1e-6
+        )
+
+    def test_replace(self, store, session):
+        """Test a second voiceprint replaces the first in place."""
+        store.create_speaker("alice")
+        first = store.add_voiceprint("alice", EMBEDDING)
+        store.get_voiceprint("alice")  # warm the embedding cache
+
+        second = store.add_voiceprint("alice", OTHER_EMBEDDING)
+
+        assert second.id == first.id
+        assert second.public_id != first.public_id
+        assert _voiceprint_count(session) == 1
+        np.testing.assert_allclose(
+            store.get_voiceprint("alice"), _unit(OTHER_EMBEDDING), atol=1e-6
+        )
+
+    def test_unknown_speaker(self, store, session):
+        """Test an unknown speaker raises and writes nothing."""
+        with pytest.raises(SpeakerNotFoundError):
+            store.add_voiceprint("nobody", EMBEDDING)
+
+        assert _voiceprint_count(session) == 0
+
+    def test_speaker_deleted_elsewhere(self, engine, store, session):
+        """Test a stale cached speaker does not leave an orphan voiceprint."""
+        store.create_speaker("alice")  # cached by this store
+        with Session(engine) as other_session:
+            other = SpeakerStore(other_session, VoiceprintCache(16), SpeakerCache(0))
+            other.delete_speaker("alice")
+
+        with pytest.raises(SpeakerNotFoundError):
+            store.add_voiceprint("alice", EMBEDDING)
+
+        assert _voiceprint_count(session) == 0
+
+    def test_speaker_lookup_uses_unique_index(self, session):
+        """Test voiceprints are found by speaker through uq_speaker_voiceprint."""
+        connection = session.connection()
+        plan = connection.execute(
+            text("EXPLAIN QUERY PLAN SELECT * FROM voiceprints WHERE speaker_id = 1")
+        )
+        details = " ".join(row[-1] for row in plan)
+        indexes = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE tbl_name = 'voiceprints'")
+        ).scalars()
+
+        assert "SEARCH voiceprints" in details
+        assert "sqlite_autoindex_voiceprints_1 (speaker_id=?)" in details
+        assert "ix_voiceprints_speaker_id" not in set(indexes)
+
+
+class TestCreateSpeaker:
+    """Tests for speaker creation."""
+
+    def test_duplicate_create(self, store):
+        """Test a duplicate speaker_id raises and the store stays usable."""
+        store.create_speaker("alice")
+
+        with pytest.raises(SpeakerAlreadyExistsError):
+            store.create_speaker("alice")
+
+        assert store.speaker_exists("alice")
+        store.create_speaker("bob")
+        assert store.speaker_exists("bob")
+
+    def test_create_with_voiceprint(self, store, session):
+        """Test the speaker and voiceprint are saved together."""
+        speaker = store.create_speaker_with_voiceprint(
+            "alice", EMBEDDING, speaker_name="Alice", pin_hash="hash"
+        )
+
+        assert speaker.id is not None
+        assert speaker.pin_hash == "hash"
+        assert store.has_voiceprint("alice")
+        np.testing.assert_allclose(
+            store.get_voiceprint("alice"), _unit(EMBEDDING), atol=1e-6
+        )
+
+    def test_duplicate_create_with_voiceprint(self, store, session):
+        """Test a duplicate writes neither row."""
+        store.create_speaker_with_voiceprint("alice", EMBEDDING)
+
+        # Also the domain-level error, so services need not import this layer
+        with pytest.raises(DuplicateSpeakerError):
+            store.create_speaker_with_voiceprint("alice", OTHER_EMBEDDING)
+
+        assert session.exec(select(func.count()).select_from(SpeakerModel)).one() == 1
+        assert _voiceprint_count(session) == 1
+        np.testing.assert_allclose(
+            store.get_voiceprint("alice"), _unit(EMBEDDING), atol=1e-6
+        )
+
+
+class TestDeleteSpeaker:
+    """Tests for speaker deletion."""
+
+    def test_delete(self, store, session):
+        """Test deleting removes the speaker and its voiceprint."""
+        store.create_speaker_with_voiceprint("alice", EMBEDDING)
+        store.create_speaker_with_voiceprint("bob", OTHER_EMBEDDING)
+
+        store.delete_speaker("alice")
+
+        assert not store.speaker_exists("alice")
+        with pytest.raises(SpeakerNotFoundError):
+            store.get_speaker_by_id("alice")
+        assert _voiceprint_count(session) == 1
+        assert store.has_voiceprint("bob")
+
+    def test_delete_unknown(self, store):
+        """Test deleting an unknown speaker raises."""
+        with pytest.raises(SpeakerNotFoundError):
+            store.delete_speaker("nobody")
+
+
+class TestGetPinHash:
+    """Tests for reading the PIN hash."""
+
+    def test_sees_change_made_elsewhere(self, engine, store):
+        """Test a PIN change through another store is not hidden by the cache."""
+        store.create_speaker("alice", pin_hash="old")
+        assert store.get_speaker_by_id("alice").pin_hash == "old"  # cached
+        with Session(engine) as other_session:
+            other = SpeakerStore(other_session, VoiceprintCache(16), SpeakerCache(0))
+            other.update_speaker_pin("alice", "new")
+
+        assert store.get_pin_hash("alice") == "new"
+
+    def test_unknown_speaker(self, store):
+        """Test an unknown speaker has no PIN hash."""
+        assert store.get_pin_hash("nobody") is None
@@ -0,0 +1,85 @@
+"""In-memory cache of decoded voiceprint embeddings."""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from voiceauth.database.settings import settings
+
+# Stored embeddings whose norm is this close to 1 are not renormalized
+_UNIT_NORM_TOLERANCE = 1e-5
+
+
+class VoiceprintCache:
+    """Thread-safe LRU cache of L2-normalized embeddings.
+
+    Keyed by the voiceprint's public_id, which is regenerated whenever the
+    voiceprint is replaced, so a stale embedding is never returned and old
+    entries simply age out. Entries are per process.
+    """
+
+    def __init__(self, maxsize: int | None = None) -> None:
+        """Initialize voiceprint cache.
+
+        Args:
+            maxsize: Maximum number of embeddings to keep.
+                Defaults to settings.voiceprint_cache_size; 0 disables caching.
+        """
+        self._maxsize = settings.voiceprint_cache_size if maxsize is None else maxsize
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, public_id: str) -> np.ndarray | None:
+        """Get a cached embedding.
+
+        Args:
+            public_id: Public ULID of the voiceprint
+
+        Returns:
+            Read-only normalized embedding, or None on a miss
+        """
+        with self._lock:
+            embedding = self._entries.get(public_id)
+            if embedding is not None:
+                self._entries.move_to_end(public_id)
+            return embedding
+
+    def put(self, public_id: str, embedding: np.ndarray) -> np.ndarray:
+        """Normalize and cache an embedding.
+
+        New rows are already stored normalized; normalizing again here keeps
+        rows written before that change correct without a data migration.
+        A normalized read-only float32 view (as returned by
+        deserialize_embedding) is cached without copying.
+
+        Args:
+            public_id: Public ULID of the voiceprint
+            embedding: Embedding as stored
+
+        Returns:
+            Read-only L2-normalized float32 copy of the embedding
+        """
+        normalized = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(normalized))
+        if norm > 0 and abs(norm - 1.0) > _UNIT_NORM_TOLERANCE:
+            normalized = normalized / norm
+        elif normalized.flags.writeable:
+            # Copy rather than freeze the caller's array
+            normalized = normalized.copy()
+        # A read-only view of an already normalized blob is cached as is
+        normalized.flags.writeable = False
+
+        if self._maxsize <= 0:
+            return normalized
+
+        with self._lock:
+            self._entries[public_id] = normalized
+            self._entries.move_to_end(public_id)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        return normalized
+
+
+# Shared by every SpeakerStore in the process
+voiceprint_cache = VoiceprintCache()
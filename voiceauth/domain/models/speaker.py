@@ -16,7 +16,7 @@ def _utc_now() -> datetime:
     return datetime.now(UTC)
 
 
-@dataclass
+@dataclass(slots=True)
 class Speaker:
     """Speaker entity representing a registered user for voice authentication."""
 
@@ -20,7 +20,7 @@ def _utc_now() -> datetime:
     return datetime.now(UTC)
 
 
-@dataclass
+@dataclass(slots=True)
 class Voiceprint:
     """Voiceprint entity for storing utterance-level voice embeddings."""
 
@@ -40,7 +40,8 @@ class Voiceprint:
         Returns:
             bytes representation of the embedding
         """
-        return embedding.astype(np.float32).tobytes()
+        # asarray skips the astype copy when the input is already float32
+        return np.asarray(embedding, dtype=np.float32).tobytes()
 
     @staticmethod
     def deserialize_embedding(data: bytes) -> np.ndarray:
@@ -6,6 +6,28 @@ Generates random digit prompts for voice enrollment and verification.
 import random
 
 
+def _random_digits(rng: random.Random, length: int) -> str:
+    """Draw a digit string with no consecutive duplicate digits.
+
+    Each digit after the first is offset from the previous one by 1-9
+    (mod 10), which is uniform over the nine other digits and needs no
+    rejection loop.
+
+    Args:
+        rng: Random number generator to draw from.
+        length: Number of digits.
+
+    Returns:
+        Random digit string.
+    """
+    digit = rng.randrange(10)
+    digits = [digit]
+    for _ in range(length - 1):
+        digit = (digit + 1 + rng.randrange(9)) % 10
+        digits.append(digit)
+    return "".join(map(str, digits))
+
+
 class PromptGenerator:
     """Generates random digit prompts for voice enrollment."""
 
@@ -28,17 +50,9 @@ class PromptGenerator:
         Returns:
             List of 5 four-digit strings.
         """
-        prompts: list[str] = []
-        for _ in range(self.NUM_SETS):
-            digits: list[str] = []
-            for j in range(self.DIGITS_PER_SET):
-                d = str(self._rng.randint(0, 9))
-                if j > 0:
-                    while d == digits[-1]:
-                        d = str(self._rng.randint(0, 9))
-                digits.append(d)
-            prompts.append("".join(digits))
-        return prompts
+        return [
+            _random_digits(self._rng, self.DIGITS_PER_SET) for _ in range(self.NUM_SETS)
+        ]
 
 
 def generate_enrollment_prompts(seed: int | None = None) -> list[str]:
@@ -81,12 +95,4 @@ def generate_verification_prompt(
     if not 4 <= length <= 6:
         raise ValueError("Prompt length must be between 4 and 6")
 
-    rng = random.Random(seed)
-    digits = [str(rng.randint(0, 9)) for _ in range(length)]
-
-    # Ensure no consecutive duplicates
-    for i in range(1, len(digits)):
-        while digits[i] == digits[i - 1]:
-            digits[i] = str(rng.randint(0, 9))
-
-    return "".join(digits)
+    return _random_digits(random.Random(seed), length)
@@ -7,7 +7,10 @@ from voiceauth.domain.protocols.enrollment import (
     EnrollmentSpeakerStoreProtocol,
     ProcessingResultProtocol,
 )
-from voiceauth.domain.protocols.store import SpeakerStoreProtocol
+from voiceauth.domain.protocols.store import (
+    DuplicateSpeakerError,
+    SpeakerStoreProtocol,
+)
 from voiceauth.domain.protocols.vad import VADProtocol
 from voiceauth.domain.protocols.verify import (
     VerificationResultProtocol,
@@ -21,6 +24,7 @@ __all__ = [
     "ASRResult",
     "TokenInfo",
     "AudioConverterProtocol",
+    "DuplicateSpeakerError",
     "EnrollmentAudioProcessorProtocol",
     "EnrollmentSpeakerStoreProtocol",
     "ProcessingResultProtocol",
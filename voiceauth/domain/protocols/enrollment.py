@@ -58,6 +58,20 @@ class EnrollmentSpeakerStoreProtocol(Protocol):
         """Create a new speaker."""
         ...
 
+    def create_speaker_with_voiceprint(
+        self,
+        speaker_id: str,
+        embedding: np.ndarray,
+        speaker_name: str | None = None,
+        pin_hash: str | None = None,
+    ) -> Speaker:
+        """Create a new speaker together with its voiceprint.
+
+        Atomic; raises DuplicateSpeakerError, writing nothing, if
+        speaker_id already exists.
+        """
+        ...
+
     def add_voiceprint(
         self,
         speaker_id: str,
@@ -8,6 +8,12 @@ from voiceauth.domain.models.speaker import Speaker
 from voiceauth.domain.models.voiceprint import Voiceprint
 
 
+class DuplicateSpeakerError(Exception):
+    """Raised by a store when the speaker_id is already registered."""
+
+    pass
+
+
 class SpeakerStoreProtocol(Protocol):
     """Protocol for Speaker data persistence."""
 
@@ -29,6 +35,32 @@ class SpeakerStoreProtocol(Protocol):
         """
         ...
 
+    def create_speaker_with_voiceprint(
+        self,
+        speaker_id: str,
+        embedding: np.ndarray,
+        speaker_name: str | None = None,
+        pin_hash: str | None = None,
+    ) -> Speaker:
+        """Create a new speaker together with its voiceprint.
+
+        The insert is atomic: callers need not check speaker_exists first,
+        and a duplicate speaker_id writes neither row.
+
+        Args:
+            speaker_id: Unique identifier for the speaker
+            embedding: numpy array of shape (512,) with float32 dtype
+            speaker_name: Optional display name
+            pin_hash: Optional SHA-256 hash of PIN
+
+        Returns:
+            The created Speaker instance
+
+        Raises:
+            DuplicateSpeakerError: If speaker_id already exists
+        """
+        ...
+
     def get_speaker_by_id(self, speaker_id: str) -> Speaker:
         """Get a speaker by their speaker_id.
 
@@ -62,6 +94,17 @@ class SpeakerStoreProtocol(Protocol):
         """
         ...
 
+    def get_pin_hash(self, speaker_id: str) -> str | None:
+        """Get a speaker's current PIN hash, bypassing any cache.
+
+        Args:
+            speaker_id: The speaker's identifier
+
+        Returns:
+            The PIN hash, or None if the speaker has no PIN or does not exist
+        """
+        ...
+
     def update_speaker_pin(self, speaker_id: str, pin_hash: str | None) -> Speaker:
         """Update a speaker's PIN hash.
 
@@ -59,6 +59,10 @@ class VerifySpeakerStoreProtocol(Protocol):
         """Get speaker by ID."""
         ...
 
+    def get_pin_hash(self, speaker_id: str) -> str | None:
+        """Get speaker's current PIN hash, bypassing any cache."""
+        ...
+
     def get_voiceprint(self, speaker_id: str) -> np.ndarray:
         """Get voiceprint embedding for speaker."""
         ...
@@ -8,6 +8,7 @@ from voiceauth.domain_service.enrollment import (
     EnrollmentState,
     SpeakerAlreadyExistsError,
 )
+from voiceauth.domain_service.enrollment_cache import EnrollmentProgressCache
 from voiceauth.domain_service.verify import (
     SpeakerNotFoundError,
     VerifyResult,
@@ -21,6 +22,7 @@ __all__ = [
     "EnrollmentSession",
     "EnrollmentState",
     "EnrollmentResult",
+    "EnrollmentProgressCache",
     "ASRResultInfo",
     "SpeakerAlreadyExistsError",
     "VerifyService",
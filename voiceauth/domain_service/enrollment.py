@@ -10,18 +10,30 @@ Manages the enrollment flow:
 """
 
 import hashlib
+import hmac
+import secrets
 from dataclasses import dataclass, field
 from enum import Enum
+from typing import TYPE_CHECKING
 
 import numpy as np
 
 from voiceauth.domain.prompt_generator import PromptGenerator
 from voiceauth.domain.protocols import (
+    DuplicateSpeakerError,
     EnrollmentAudioProcessorProtocol,
     EnrollmentSpeakerStoreProtocol,
 )
 from voiceauth.domain_service.settings import settings
 
+if TYPE_CHECKING:
+    from voiceauth.domain_service.enrollment_cache import EnrollmentProgressCache
+
+
+def _new_resume_token() -> str:
+    """Generate an unguessable token for resuming an enrollment."""
+    return secrets.token_urlsafe(32)
+
 
 class EnrollmentState(Enum):
     """States for the enrollment flow."""
@@ -49,6 +61,8 @@ class EnrollmentSession:
     # Accumulated utterance-level embeddings (one per successful prompt)
     accumulated_embeddings: list[np.ndarray] = field(default_factory=list)
     error_message: str | None = None
+    # Proof of ownership required to resume this session after a reconnect
+    resume_token: str = field(default_factory=_new_resume_token)
 
 
 @dataclass
@@ -87,30 +101,39 @@ class EnrollmentService:
         self,
         audio_processor: EnrollmentAudioProcessorProtocol,
         speaker_store: EnrollmentSpeakerStoreProtocol,
+        progress_cache: "EnrollmentProgressCache | None" = None,
     ) -> None:
         """Initialize enrollment service.
 
         Args:
             audio_processor: Audio processor for voice processing.
             speaker_store: Store for speaker database operations.
+            progress_cache: Optional cache used to resume interrupted
+                enrollments.
         """
         self.audio_processor = audio_processor
         self.speaker_store = speaker_store
+        self.progress_cache = progress_cache
         self._prompt_generator = PromptGenerator()
 
     def start_enrollment(
         self,
         speaker_id: str,
         speaker_name: str | None = None,
+        resume_token: str | None = None,
     ) -> EnrollmentSession:
         """Start a new enrollment session.
 
         Args:
             speaker_id: Unique identifier for the speaker.
             speaker_name: Optional display name.
+            resume_token: Token of an interrupted session to resume, as
+                issued with its prompts.
 
         Returns:
-            New EnrollmentSession with generated prompts.
+            New EnrollmentSession with generated prompts, or the saved
+            session (same prompts, completed sets and retry count kept)
+            when resuming. A resumed session gets a new resume token.
 
         Raises:
             SpeakerAlreadyExistsError: If speaker_id already exists.
@@ -118,6 +141,16 @@ class EnrollmentService:
         if self.speaker_store.speaker_exists(speaker_id):
             raise SpeakerAlreadyExistsError(f"Speaker '{speaker_id}' already exists")
 
+        # Resume an interrupted enrollment if progress was saved
+        if self.progress_cache is not None and resume_token:
+            resumed = self.progress_cache.take(resume_token, speaker_id)
+            if resumed is not None:
+                if speaker_name is not None:
+                    resumed.speaker_name = speaker_name
+                resumed.resume_token = _new_resume_token()
+                self.progress_cache.put(resumed)
+                return resumed
+
         session = EnrollmentSession(
             speaker_id=speaker_id,
             speaker_name=speaker_name,
@@ -163,6 +196,9 @@ class EnrollmentService:
             if session.current_set_index >= len(session.prompts):
                 session.state = EnrollmentState.COMPLETED_VOICE
 
+            if self.progress_cache is not None:
+                self.progress_cache.put(session)
+
             return ASRResultInfo(
                 success=True,
                 asr_text=result.digits,
@@ -185,6 +221,8 @@ class EnrollmentService:
                 session.error_message = (
                     f"リトライ上限({session.max_retries}回)に達しました"
                 )
+                if self.progress_cache is not None:
+                    self.progress_cache.discard(session.resume_token)
                 return ASRResultInfo(
                     success=False,
                     asr_text="",
@@ -196,6 +234,10 @@ class EnrollmentService:
                     message=session.error_message,
                 )
 
+            # Save the retry count so reconnecting does not reset it
+            if self.progress_cache is not None:
+                self.progress_cache.put(session)
+
             return ASRResultInfo(
                 success=False,
                 asr_text=str(e),
@@ -225,11 +267,15 @@ class EnrollmentService:
         if not session.accumulated_embeddings:
             raise ValueError("No embeddings accumulated")
 
-        centroid = np.mean(session.accumulated_embeddings, axis=0).astype(np.float32)
+        # Stack straight into float32 instead of building a float64
+        # temporary. The mean's 1/N scaling is skipped: L2 normalization
+        # of the sum gives the same direction.
+        stack = np.stack(session.accumulated_embeddings, dtype=np.float32)
+        centroid = stack.sum(axis=0, dtype=np.float32)
         # L2 normalize
         norm = np.linalg.norm(centroid)
         if norm > 0:
-            centroid = centroid / norm
+            centroid /= norm
         return centroid
 
     def register_pin(self, pin: str) -> str:
@@ -259,7 +305,7 @@ class EnrollmentService:
         Returns:
             True if PIN matches hash.
         """
-        return hashlib.sha256(pin.encode()).hexdigest() == pin_hash
+        return hmac.compare_digest(hashlib.sha256(pin.encode()).hexdigest(), pin_hash)
 
     def complete_enrollment(
         self,
@@ -277,6 +323,8 @@ class EnrollmentService:
 
         Raises:
             ValueError: If voice enrollment is not complete.
+            SpeakerAlreadyExistsError: If the speaker_id was registered
+                after start_enrollment checked it; nothing is saved.
         """
         if session.state != EnrollmentState.COMPLETED_VOICE:
             raise ValueError("Voice enrollment is not complete")
@@ -287,20 +335,26 @@ class EnrollmentService:
         # Hash PIN if provided
         pin_hash = self.register_pin(pin) if pin else None
 
-        # Create speaker
-        self.speaker_store.create_speaker(
-            speaker_id=session.speaker_id,
-            speaker_name=session.speaker_name,
-            pin_hash=pin_hash,
-        )
-
-        # Add voiceprint
-        self.speaker_store.add_voiceprint(
-            speaker_id=session.speaker_id,
-            embedding=centroid,
-        )
+        # Create speaker and voiceprint in one transaction
+        try:
+            self.speaker_store.create_speaker_with_voiceprint(
+                speaker_id=session.speaker_id,
+                embedding=centroid,
+                speaker_name=session.speaker_name,
+                pin_hash=pin_hash,
+            )
+        except DuplicateSpeakerError as e:
+            # Registered by another connection since start_enrollment
+            session.state = EnrollmentState.FAILED
+            if self.progress_cache is not None:
+                self.progress_cache.discard(session.resume_token)
+            raise SpeakerAlreadyExistsError(
+                f"Speaker '{session.speaker_id}' already exists"
+            ) from e
 
         session.state = EnrollmentState.COMPLETED
+        if self.progress_cache is not None:
+            self.progress_cache.discard(session.resume_token)
 
         return EnrollmentResult(
             speaker_id=session.speaker_id,
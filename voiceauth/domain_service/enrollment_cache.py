@@ -0,0 +1,108 @@
+"""In-memory cache of in-progress enrollment sessions.
+
+Keeps the prompts and accumulated utterance embeddings of an unfinished
+enrollment for a limited time, so a client that reconnects (e.g. after a
+dropped WebSocket) resumes at the next prompt set instead of starting over.
+
+Progress is keyed by the session's resume token, an unguessable value that
+is only sent to the connection that owns the session. Knowing a speaker_id
+is not enough to take over someone else's enrollment.
+"""
+
+import threading
+import time
+from dataclasses import replace
+
+from voiceauth.domain_service.enrollment import EnrollmentSession, EnrollmentState
+from voiceauth.domain_service.settings import settings
+
+
+class EnrollmentProgressCache:
+    """Thread-safe TTL cache of enrollment progress keyed by resume token.
+
+    Entries are per process; they are not shared between server workers.
+    """
+
+    def __init__(self, ttl: float | None = None) -> None:
+        """Initialize progress cache.
+
+        Args:
+            ttl: Seconds to keep progress after the last update.
+                Defaults to settings.enrollment_resume_ttl.
+        """
+        self._ttl = settings.enrollment_resume_ttl if ttl is None else ttl
+        self._entries: dict[str, tuple[float, EnrollmentSession]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, resume_token: str, speaker_id: str) -> EnrollmentSession | None:
+        """Remove and return the saved progress for a resume token.
+
+        An entry can be taken only once, so two connections cannot continue
+        the same snapshot; the resumed session is saved again under a new
+        token.
+
+        Args:
+            resume_token: Token issued with the session's prompts.
+            speaker_id: Speaker the client is enrolling; must match the
+                saved session.
+
+        Returns:
+            Session ready to continue (retry count kept), or None.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(resume_token)
+            if entry is None:
+                return None
+            expires_at, saved = entry
+            if expires_at <= now:
+                del self._entries[resume_token]
+                return None
+            if saved.speaker_id != speaker_id:
+                return None
+            del self._entries[resume_token]
+
+        if saved.state == EnrollmentState.FAILED:
+            return None
+
+        completed = saved.current_set_index >= len(saved.prompts)
+        return replace(
+            saved,
+            prompts=list(saved.prompts),
+            accumulated_embeddings=list(saved.accumulated_embeddings),
+            error_message=None,
+            state=EnrollmentState.COMPLETED_VOICE
+            if completed
+            else EnrollmentState.PROMPTS_SENT,
+        )
+
+    def put(self, session: EnrollmentSession) -> None:
+        """Save a snapshot of the session's progress.
+
+        Args:
+            session: Session after a processed prompt set attempt.
+        """
+        if self._ttl <= 0:
+            return
+
+        snapshot = replace(
+            session,
+            prompts=list(session.prompts),
+            accumulated_embeddings=list(session.accumulated_embeddings),
+        )
+        now = time.monotonic()
+        with self._lock:
+            # Drop expired entries so abandoned enrollments do not accumulate
+            expired = [k for k, (exp, _) in self._entries.items() if exp <= now]
+            for key in expired:
+                del self._entries[key]
+            self._entries[session.resume_token] = (now + self._ttl, snapshot)
+
+    def discard(self, resume_token: str) -> None:
+        """Remove saved progress for a session.
+
+        Args:
+            resume_token: Token of the session that finished or failed.
+        """
+        with self._lock:
+            self._entries.pop(resume_token, None)
@@ -14,6 +14,10 @@ class DomainServiceSettings(BaseSettings):
 
     # Enrollment settings
     enrollment_max_retries: int = 5
+    # Seconds to keep progress for resume; 0 disables. Progress is held in
+    # process memory, so resume only works with a single server worker (or
+    # sticky routing); the API disables it when API_WORKERS > 1.
+    enrollment_resume_ttl: float = 600.0
 
     # Verification settings
     verification_prompt_length: int = 4
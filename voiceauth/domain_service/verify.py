@@ -8,6 +8,7 @@ Manages the verification flow:
 """
 
 import hashlib
+import hmac
 from dataclasses import dataclass
 from enum import Enum
 
@@ -237,10 +238,11 @@ class VerifyService:
                 message="PIN認証は利用できません",
             )
 
-        # Get speaker's PIN hash
-        speaker = self.speaker_store.get_speaker_by_id(session.speaker_id)
+        # Read the PIN hash fresh: a cached record could miss a PIN change
+        # or deletion made through another worker
+        stored_hash = self.speaker_store.get_pin_hash(session.speaker_id)
 
-        if speaker.pin_hash is None:
+        if stored_hash is None:
             session.state = VerifyState.FAILED
             return VerifyResult(
                 authenticated=False,
@@ -253,10 +255,10 @@ class VerifyService:
                 message="PINが登録されていません",
             )
 
-        # Verify PIN
+        # Verify PIN (constant-time comparison)
         pin_hash = hashlib.sha256(pin.encode()).hexdigest()
 
-        if pin_hash == speaker.pin_hash:
+        if hmac.compare_digest(pin_hash, stored_hash):
             session.state = VerifyState.AUTHENTICATED
             session.auth_method = "pin"
             return VerifyResult(
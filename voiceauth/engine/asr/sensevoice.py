@@ -62,6 +62,12 @@ DIGIT_NORMALIZATION = {
     "nine": "9",
 }
 
+# Readings sorted longest first so overlapping patterns match the longer
+# reading; built once instead of on every normalization
+_READINGS_LONGEST_FIRST = tuple(
+    sorted(DIGIT_NORMALIZATION.items(), key=lambda x: len(x[0]), reverse=True)
+)
+
 
 class SenseVoiceASR:
     """Speech recognizer using SenseVoice.
@@ -125,7 +131,7 @@ class SenseVoiceASR:
 
         try:
             stream = recognizer.create_stream()
-            stream.accept_waveform(sample_rate, audio.astype(np.float32))
+            stream.accept_waveform(sample_rate, np.asarray(audio, dtype=np.float32))
             recognizer.decode_stream(stream)
 
             result = stream.result
@@ -179,11 +185,9 @@ class SenseVoiceASR:
         """
         result = text
 
-        # Replace known digit readings with numeric characters
-        # Sort by length (longest first) to handle overlapping patterns
-        for reading, digit in sorted(
-            DIGIT_NORMALIZATION.items(), key=lambda x: len(x[0]), reverse=True
-        ):
+        # Replace known digit readings with numeric characters,
+        # longest first to handle overlapping patterns
+        for reading, digit in _READINGS_LONGEST_FIRST:
             result = result.replace(reading, digit)
 
         # Keep only digits
@@ -245,9 +249,7 @@ def extract_digit_timestamps(
 
     for token in asr_result.tokens:
         token_normalized = ""
-        for reading, digit in sorted(
-            DIGIT_NORMALIZATION.items(), key=lambda x: len(x[0]), reverse=True
-        ):
+        for reading, digit in _READINGS_LONGEST_FIRST:
             if reading in token.token:
                 token_normalized += digit
                 break
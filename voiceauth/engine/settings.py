@@ -35,6 +35,9 @@ class EngineSettings(BaseSettings):
     speaker_model_file: str = "3dspeaker_speech_campplus_sv_en_voxceleb_16k.onnx"
     speaker_num_threads: int = 1
     speaker_similarity_threshold: float = 0.85
+    # Truncate embeddings to this many leading dims (Matryoshka-trained models
+    # only; CAM++ is not, so keep None unless the model is swapped)
+    speaker_embedding_dim: int | None = None
 
     # Audio settings
     target_sample_rate: int = 16000
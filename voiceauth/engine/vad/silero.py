@@ -1,5 +1,7 @@
 """Voice Activity Detection using Silero VAD."""
 
+import threading
+
 import numpy as np
 import sherpa_onnx
 
@@ -15,6 +17,9 @@ class SileroVAD:
     """Voice Activity Detector using Silero VAD.
 
     Implements VADProtocol from voiceauth.domain.protocols.vad.
+
+    The underlying detector is stateful, so calls are serialized with a lock
+    to make a shared instance safe to use from worker threads.
     """
 
     def __init__(self, model_path: str | None = None) -> None:
@@ -25,6 +30,7 @@ class SileroVAD:
         """
         self._vad: sherpa_onnx.VoiceActivityDetector | None = None
         self._model_path = model_path or str(settings.vad_model_path)
+        self._lock = threading.Lock()
 
     def _ensure_loaded(self) -> sherpa_onnx.VoiceActivityDetector:
         """Ensure VAD model is loaded."""
@@ -65,23 +71,24 @@ class SileroVAD:
         """
         vad = self._ensure_loaded()
 
-        # Reset VAD state
-        vad.reset()
+        with self._lock:
+            # Reset VAD state
+            vad.reset()
 
-        # Process audio in chunks (window_size samples = 512 for 16kHz)
-        window_size = 512
-        samples = audio.astype(np.float32)
+            # Process audio in chunks (window_size samples = 512 for 16kHz)
+            window_size = 512
+            samples = np.asarray(audio, dtype=np.float32)
 
-        for i in range(0, len(samples), window_size):
-            chunk = samples[i : i + window_size]
-            if len(chunk) < window_size:
-                # Pad last chunk with zeros
-                chunk = np.pad(chunk, (0, window_size - len(chunk)))
-            vad.accept_waveform(chunk)
+            for i in range(0, len(samples), window_size):
+                chunk = samples[i : i + window_size]
+                if len(chunk) < window_size:
+                    # Pad last chunk with zeros
+                    chunk = np.pad(chunk, (0, window_size - len(chunk)))
+                vad.accept_waveform(chunk)
 
-        # Check if any speech segments were detected
-        vad.flush()
-        return not vad.empty()
+            # Check if any speech segments were detected
+            vad.flush()
+            return not vad.empty()
 
     def get_speech_segments(self, audio: np.ndarray) -> list[tuple[float, float]]:
         """Get speech segments from audio.
@@ -94,31 +101,32 @@ class SileroVAD:
         """
         vad = self._ensure_loaded()
 
-        # Reset VAD state
-        vad.reset()
+        with self._lock:
+            # Reset VAD state
+            vad.reset()
 
-        window_size = 512
-        samples = audio.astype(np.float32)
+            window_size = 512
+            samples = np.asarray(audio, dtype=np.float32)
 
-        for i in range(0, len(samples), window_size):
-            chunk = samples[i : i + window_size]
-            if len(chunk) < window_size:
-                chunk = np.pad(chunk, (0, window_size - len(chunk)))
-            vad.accept_waveform(chunk)
+            for i in range(0, len(samples), window_size):
+                chunk = samples[i : i + window_size]
+                if len(chunk) < window_size:
+                    chunk = np.pad(chunk, (0, window_size - len(chunk)))
+                vad.accept_waveform(chunk)
 
-        vad.flush()
+            vad.flush()
 
-        segments: list[tuple[float, float]] = []
-        while not vad.empty():
-            segment = vad.front
-            start_sec = segment.start / settings.target_sample_rate
-            end_sec = (
-                segment.start + len(segment.samples)
-            ) / settings.target_sample_rate
-            segments.append((start_sec, end_sec))
-            vad.pop()
+            segments: list[tuple[float, float]] = []
+            while not vad.empty():
+                segment = vad.front
+                start_sec = segment.start / settings.target_sample_rate
+                end_sec = (
+                    segment.start + len(segment.samples)
+                ) / settings.target_sample_rate
+                segments.append((start_sec, end_sec))
+                vad.pop()
 
-        return segments
+            return segments
 
     def extract_speech(self, audio: np.ndarray) -> np.ndarray:
         """Extract speech segments from audio.
@@ -134,27 +142,33 @@ class SileroVAD:
         """
         vad = self._ensure_loaded()
 
-        # Reset VAD state
-        vad.reset()
+        with self._lock:
+            # Reset VAD state
+            vad.reset()
 
-        window_size = 512
-        samples = audio.astype(np.float32)
+            window_size = 512
+            samples = np.asarray(audio, dtype=np.float32)
 
-        for i in range(0, len(samples), window_size):
-            chunk = samples[i : i + window_size]
-            if len(chunk) < window_size:
-                chunk = np.pad(chunk, (0, window_size - len(chunk)))
-            vad.accept_waveform(chunk)
+            for i in range(0, len(samples), window_size):
+                chunk = samples[i : i + window_size]
+                if len(chunk) < window_size:
+                    chunk = np.pad(chunk, (0, window_size - len(chunk)))
+                vad.accept_waveform(chunk)
 
-        vad.flush()
+            vad.flush()
 
-        if vad.empty():
-            raise NoSpeechDetectedError("No speech detected in audio")
+            if vad.empty():
+                raise NoSpeechDetectedError("No speech detected in audio")
 
-        speech_samples: list[np.ndarray] = []
-        while not vad.empty():
-            segment = vad.front
-            speech_samples.append(np.array(segment.samples, dtype=np.float32))
-            vad.pop()
+            segments: list[list[float]] = []
+            while not vad.empty():
+                segments.append(vad.front.samples)
+                vad.pop()
 
-        return np.concatenate(speech_samples)
+            # Write segments straight into one preallocated output
+            speech = np.empty(sum(len(s) for s in segments), dtype=np.float32)
+            pos = 0
+            for segment_samples in segments:
+                speech[pos : pos + len(segment_samples)] = segment_samples
+                pos += len(segment_samples)
+            return speech
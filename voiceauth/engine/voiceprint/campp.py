@@ -1,5 +1,7 @@
 """Voiceprint extraction using CAM++."""
 
+import math
+
 import numpy as np
 import sherpa_onnx
 
@@ -46,6 +48,8 @@ class CAMPPVoiceprint:
     def embedding_dim(self) -> int:
         """Get the dimension of voiceprint embeddings."""
         extractor = self._ensure_loaded()
+        if settings.speaker_embedding_dim is not None:
+            return min(extractor.dim, settings.speaker_embedding_dim)
         return extractor.dim
 
     def extract(
@@ -60,7 +64,8 @@ class CAMPPVoiceprint:
             sample_rate: Sample rate of audio. Defaults to settings.target_sample_rate.
 
         Returns:
-            Voiceprint as float32 numpy array (512 dimensions for CAM++ model).
+            Voiceprint as float32 numpy array (512 dimensions for CAM++ model,
+            or settings.speaker_embedding_dim when truncation is configured).
 
         Raises:
             SpeakerEmbeddingError: If extraction fails.
@@ -72,7 +77,7 @@ class CAMPPVoiceprint:
 
         try:
             stream = extractor.create_stream()
-            stream.accept_waveform(sample_rate, audio.astype(np.float32))
+            stream.accept_waveform(sample_rate, np.asarray(audio, dtype=np.float32))
 
             if not extractor.is_ready(stream):
                 raise SpeakerEmbeddingError(
@@ -80,6 +85,15 @@ class CAMPPVoiceprint:
                 )
 
             embedding = np.array(extractor.compute(stream), dtype=np.float32)
+
+            # Matryoshka truncation: keep leading dims and re-normalize
+            dim = settings.speaker_embedding_dim
+            if dim is not None and dim < len(embedding):
+                embedding = embedding[:dim]
+                norm = np.linalg.norm(embedding)
+                if norm > 0:
+                    embedding /= norm
+
             return embedding
 
         except SpeakerEmbeddingError:
@@ -91,6 +105,9 @@ class CAMPPVoiceprint:
 def cosine_similarity(embedding1: np.ndarray, embedding2: np.ndarray) -> float:
     """Calculate cosine similarity between two embeddings.
 
+    Integer (e.g. int8-quantized) embeddings are accepted; they are widened
+    to int32 so the dot product cannot overflow.
+
     Args:
         embedding1: First embedding vector.
         embedding2: Second embedding vector.
@@ -98,13 +115,19 @@ def cosine_similarity(embedding1: np.ndarray, embedding2: np.ndarray) -> float:
     Returns:
         Cosine similarity score in range [-1, 1].
     """
-    norm1 = np.linalg.norm(embedding1)
-    norm2 = np.linalg.norm(embedding2)
-
-    if norm1 == 0 or norm2 == 0:
+    if embedding1.dtype.kind in "iu":
+        embedding1 = embedding1.astype(np.int32)
+    if embedding2.dtype.kind in "iu":
+        embedding2 = embedding2.astype(np.int32)
+
+    # vdot goes straight to BLAS; one sqrt of the product of squared norms
+    squared_norms = float(np.vdot(embedding1, embedding1)) * float(
+        np.vdot(embedding2, embedding2)
+    )
+    if squared_norms == 0:
         return 0.0
 
-    return float(np.dot(embedding1, embedding2) / (norm1 * norm2))
+    return float(np.vdot(embedding1, embedding2)) / math.sqrt(squared_norms)
 
 
 def compute_centroid(embeddings: list[np.ndarray]) -> np.ndarray: